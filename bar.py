@@ -11,6 +11,7 @@ except (ValueError, ImportError):
 
 from gi.repository import Gtk, Gdk, GLib
 import os
+import weakref
 from window_island import WindowIsland
 from time_island import TimeIsland
 from battery_island import BatteryIsland
@@ -18,6 +19,37 @@ from workspace_island import WorkspaceIsland
 from system_stats_island import SystemStatsIsland
 from systray_island import SystrayIsland  # Import the new SystrayIsland
 
+# Fallback CSS used when style.css cannot be loaded
+_FALLBACK_CSS = """
+.topbar-transparent {
+    background-color: transparent;
+    padding: 8px 0px;
+}
+.island {
+    background-color: rgba(30, 30, 46, 0.9);
+    border-radius: 12px;
+    padding: 8px 16px;
+    border: 1px solid rgba(49, 50, 68, 0.8);
+}
+window {
+    background: none;
+}
+"""
+_FALLBACK_CSS_BYTES = _FALLBACK_CSS.encode()
+
+# Extra CSS applied on top of style.css in low-power mode
+# (TOPBAR_LOWFX=1, or the software cairo renderer)
+_LOWFX_CSS_BYTES = b"""
+* { box-shadow: none; transition: none; animation: none; }
+.island { border-radius: 6px; }
+"""
+_lowfx_provider = None
+
+# Loaded CSS providers keyed by file path: path -> (mtime, provider)
+_CSS_CACHE: dict[str, tuple[float, Gtk.CssProvider]] = {}
+# Displays each provider has already been added to
+_registered_displays: "weakref.WeakKeyDictionary[Gtk.CssProvider, weakref.WeakSet]" = weakref.WeakKeyDictionary()
+
 class LayerTopBar(Gtk.ApplicationWindow):
     def __init__(self, app):
         super().__init__(application=app)
@@ -67,13 +99,10 @@ class LayerTopBar(Gtk.ApplicationWindow):
         self.window_island = WindowIsland(workspace_island_ref=self.workspace_island)
         left_container.append(self.window_island)
         
-        # Center section with time island
-        center_container = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
-        center_container.set_halign(Gtk.Align.CENTER)
-        center_container.set_hexpand(False)
-        
+        # Center section: the time island is the center widget itself, no wrapper box
         self.time_island = TimeIsland()
-        center_container.append(self.time_island)
+        self.time_island.set_halign(Gtk.Align.CENTER)
+        self.time_island.set_hexpand(False)
         
         # Right section with systray, system stats, and battery islands
         right_container = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
@@ -92,7 +121,7 @@ class LayerTopBar(Gtk.ApplicationWindow):
         
         # Add all sections to main CenterBox
         main_box.set_start_widget(left_container)
-        main_box.set_center_widget(center_container)
+        main_box.set_center_widget(self.time_island)
         main_box.set_end_widget(right_container)
         
         # Set the main box as the window child
@@ -100,42 +129,65 @@ class LayerTopBar(Gtk.ApplicationWindow):
     
     def setup_css(self):
         """Set up CSS styling for the top bar"""
-        css_provider = Gtk.CssProvider()
-        
         # Get the directory where the script is located
         script_dir = os.path.dirname(os.path.abspath(__file__))
         css_file_path = os.path.join(script_dir, "style.css")
         
+        # Apply CSS to the display
+        display = Gdk.Display.get_default()
+        self._add_provider_once(display, self._get_css_provider(css_file_path),
+                                Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
+        
+        # Low-power mode: drop shadows/transitions that are slow to composite
+        if os.environ.get("TOPBAR_LOWFX") == "1" or os.environ.get("GSK_RENDERER") == "cairo":
+            self._add_provider_once(display, self._get_lowfx_provider(),
+                                    Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION + 1)
+
+    @staticmethod
+    def _add_provider_once(display, css_provider, priority):
+        """Add css_provider to display unless it is already registered there"""
+        displays = _registered_displays.setdefault(css_provider, weakref.WeakSet())
+        if display in displays:
+            return
+        Gtk.StyleContext.add_provider_for_display(display, css_provider, priority)
+        displays.add(display)
+
+    @staticmethod
+    def _get_lowfx_provider():
+        """Return the shared CssProvider for TOPBAR_LOWFX mode"""
+        global _lowfx_provider
+        if _lowfx_provider is None:
+            _lowfx_provider = Gtk.CssProvider()
+            _lowfx_provider.load_from_data(_LOWFX_CSS_BYTES)
+        return _lowfx_provider
+
+    @staticmethod
+    def _get_css_provider(css_file_path):
+        """Return a cached CssProvider for css_file_path, reloading only if the file changed"""
+        try:
+            mtime = os.stat(css_file_path).st_mtime
+        except OSError:
+            mtime = None
+        
+        cached = _CSS_CACHE.get(css_file_path)
+        if cached:
+            if cached[0] == mtime:
+                return cached[1]
+            # File changed on disk: drop the stale provider from any display using it
+            for display in _registered_displays.pop(cached[1], ()):
+                Gtk.StyleContext.remove_provider_for_display(display, cached[1])
+        
+        css_provider = Gtk.CssProvider()
         try:
             # Load CSS from external file
             css_provider.load_from_path(css_file_path)
         except Exception as e:
             print(f"Error loading CSS file: {e}")
             # Fallback to basic inline CSS if file loading fails
-            fallback_css = """
-            .topbar-transparent {
-                background-color: transparent;
-                padding: 8px 0px;
-            }
-            .island {
-                background-color: rgba(30, 30, 46, 0.9);
-                border-radius: 12px;
-                padding: 8px 16px;
-                border: 1px solid rgba(49, 50, 68, 0.8);
-            }
-            window {
-                background-color: transparent;
-            }
-            """
-            css_provider.load_from_data(fallback_css.encode())
+            css_provider.load_from_data(_FALLBACK_CSS_BYTES)
         
-        # Apply CSS to the display
-        display = Gdk.Display.get_default()
-        Gtk.StyleContext.add_provider_for_display(
-            display, 
-            css_provider, 
-            Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
-        )
+        _CSS_CACHE[css_file_path] = (mtime, css_provider)
+        return css_provider
 
 class TopBarApp(Gtk.Application):
     def __init__(self):
@@ -151,6 +203,13 @@ class TopBarApp(Gtk.Application):
         window.present()
 
 def main():
+    # Choose the GSK renderer before GTK creates one; TOPBAR_RENDERER overrides (e.g. "cairo")
+    renderer = os.environ.get("TOPBAR_RENDERER")
+    if renderer:
+        os.environ["GSK_RENDERER"] = renderer
+    else:
+        os.environ.setdefault("GSK_RENDERER", "ngl")
+    
     app = TopBarApp()
     app.run()
 
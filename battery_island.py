@@ -1,20 +1,32 @@
 import gi
 gi.require_version('Gtk', '4.0')
-from gi.repository import Gtk, GLib
-import os
-import socket
-import json
-import threading
+from gi.repository import Gtk, GLib, Pango
 import logging
+from functools import lru_cache
+from service_client import ServiceClient
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# State CSS classes (colors live in style.css)
+# Indexed by [is_charging][bucket], bucket 0: <=15%, 1: <=30%, 2: above
+BATTERY_STATE_CLASSES = (
+    ("battery-critical", "battery-low", "battery-normal"),
+    ("battery-charging", "battery-charging", "battery-charging"),
+)
+BATTERY_AC_CLASS = "battery-ac"
+# Label text templates, filled with %-formatting in one step
+_TEXT_TMPL = "%s%%"
+_TEXT_WITH_TIME_TMPL = "%s%% (%s %s)"
+BATTERY_AC_ICON = "󰚥"
+
 class BatteryIsland(Gtk.Box):
     # --- CONFIGURATION ---
     # Icons for 0-9%, 10-19%, ..., 90-99%
     BATTERY_ICONS = ["󰁺", "󰁻", "󰁼", "󰁽", "󰁾", "󰁿", "󰂀", "󰂁", "󰂂", "󰁹"]
+    # Direct lookup for 0..99%: each icon repeated for its ten percentages
+    BATTERY_ICON_BY_PERCENT = tuple(icon for icon in BATTERY_ICONS for _ in range(10))
     BATTERY_ICON_FULL = "󰁹"
     BATTERY_ICON_CHARGING = "󰂄"
     ICON_FONT_FAMILY = "Symbols Nerd Font" # Ensure this font is installed
@@ -24,60 +36,35 @@ class BatteryIsland(Gtk.Box):
         self.add_css_class("island")
         self.add_css_class("battery-island")
         
-        self.battery_label = Gtk.Label()
-        self.battery_label.add_css_class("battery-label")
-        self.append(self.battery_label)
+        # Icon and text are separate plain labels: no Pango markup to parse,
+        # and color/font come from CSS state classes on the island
+        self.icon_label = Gtk.Label()
+        self.icon_label.add_css_class("battery-icon")
+        # Resolve the icon font once instead of by name on every update
+        self._icon_attrs = Pango.AttrList()
+        self._icon_attrs.insert(Pango.attr_font_desc_new(Pango.FontDescription.from_string(self.ICON_FONT_FAMILY)))
+        self.icon_label.set_attributes(self._icon_attrs)
+        self.append(self.icon_label)
         
-        self.socket_path = "/tmp/combined_service.sock"
-        self.service_socket = None
-        self.connect_to_service()
-    
-    def connect_to_service(self):
-        def connect():
-            try:
-                self.service_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-                self.service_socket.connect(self.socket_path)
-                threading.Thread(target=self.listen_for_updates, daemon=True).start()
-                logger.info("Connected to combined_service for battery updates")
-            except Exception:
-                logger.warning("Failed to connect to combined_service. Retrying.")
-                self.service_socket = None
-                GLib.timeout_add_seconds(5, self.retry_connection)
-        threading.Thread(target=connect, daemon=True).start()
-
-    def retry_connection(self):
-        if not self.service_socket:
-            self.connect_to_service()
-        return False
-
-    def listen_for_updates(self):
-        try:
-            buffer = ""
-            while True:
-                data = self.service_socket.recv(1024).decode('utf-8')
-                if not data: break
-                buffer += data
-                while '\n' in buffer:
-                    line, buffer = buffer.split('\n', 1)
-                    if line.strip():
-                        service_data = json.loads(line)
-                        logger.debug(f"Received from service: {service_data}")
-                        GLib.idle_add(self.update_battery_display, service_data)
-        except (socket.error, json.JSONDecodeError, BrokenPipeError):
-            logger.warning("Battery service connection lost.")
-        finally:
-            self.service_socket = None
-            GLib.idle_add(self.retry_connection)
+        self.text_label = Gtk.Label()
+        self.text_label.add_css_class("battery-label")
+        self.append(self.text_label)
+        
+        self._current_class = None
+        
+        ServiceClient.get().subscribe(self.update_battery_display)
     
-    def _get_battery_icon(self, percentage, is_charging):
+    @staticmethod
+    def _get_battery_icon(percentage, is_charging):
         if is_charging:
-            return self.BATTERY_ICON_CHARGING
+            return BatteryIsland.BATTERY_ICON_CHARGING
         if percentage >= 100:
-            return self.BATTERY_ICON_FULL
-        index = max(0, min(int(percentage / 10), len(self.BATTERY_ICONS) - 1))
-        return self.BATTERY_ICONS[index]
+            return BatteryIsland.BATTERY_ICON_FULL
+        return BatteryIsland.BATTERY_ICON_BY_PERCENT[max(percentage, 0)]
 
-    def _format_time(self, seconds):
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _format_time(seconds):
         if seconds is None or seconds <= 0:
             return ""
         hours = seconds // 3600
@@ -96,21 +83,25 @@ class BatteryIsland(Gtk.Box):
             icon = self._get_battery_icon(percentage, is_charging)
             time_str = self._format_time(time_remaining)
             
-            text = f"{percentage}%"
             if time_str:
-                action = "charging" if is_charging else "remaining"
-                text += f" ({time_str} {action})"
+                text = _TEXT_WITH_TIME_TMPL % (percentage, time_str, "charging" if is_charging else "remaining")
+            else:
+                text = _TEXT_TMPL % percentage
             
-            if percentage <= 15 and not is_charging: color = "#f38ba8" # Red
-            elif percentage <= 30 and not is_charging: color = "#fab387" # Orange
-            elif is_charging: color = "#a6e3a1" # Green
-            else: color = "#cdd6f4" # Default
-            
-            markup = (f'<span font_family="{self.ICON_FONT_FAMILY}" color="{color}">{icon}</span>'
-                      f'<span color="{color}"> {text}</span>')
-            self.battery_label.set_markup(markup)
+            bucket = 0 if percentage <= 15 else 1 if percentage <= 30 else 2
+            state_class = BATTERY_STATE_CLASSES[bool(is_charging)][bucket]
         else:
-            markup = f'<span font_family="{self.ICON_FONT_FAMILY}">󰚥</span> AC Power'
-            self.battery_label.set_markup(markup)
+            icon, text, state_class = BATTERY_AC_ICON, "AC Power", BATTERY_AC_CLASS
+        
+        # Only touch GTK when something actually changed
+        if state_class != self._current_class:
+            if self._current_class:
+                self.remove_css_class(self._current_class)
+            self.add_css_class(state_class)
+            self._current_class = state_class
+        if self.icon_label.get_label() != icon:
+            self.icon_label.set_label(icon)
+        if self.text_label.get_label() != text:
+            self.text_label.set_label(text)
         
         return GLib.SOURCE_REMOVE
\ No newline at end of file
@@ -5,18 +5,28 @@ import os
 import sys
 import time
 import json
+try:
+    from orjson import dumps as _json_dumps # C encoder, returns bytes directly
+except ImportError:
+    def _json_dumps(obj): return json.dumps(obj, separators=(',', ':')).encode('utf-8')
 import socket
-import threading
 import signal
 import logging
-import glob
 import ctypes
 import ctypes.util
 import errno
 import select
 import fcntl
+import struct
+import subprocess
+from datetime import datetime
 from typing import Any, Optional
 
+# Setup logging
+# Before the gi import so its log lines use this config; verbose battery/inotify tracing only with --debug
+logging.basicConfig(level=logging.DEBUG if '--debug' in sys.argv else logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
 # --- GObject and Cvc/WirePlumber Setup ---
 try:
     import gi
@@ -25,33 +35,97 @@ try:
     gi.require_version("Cvc", "1.0")
     from gi.repository import GObject, GLib, Cvc
     CVC_AVAILABLE = True
-    logging.info("gi and Cvc libraries found, WirePlumber monitoring will be enabled.")
+    logger.info("gi and Cvc libraries found, WirePlumber monitoring will be enabled.")
 except (ImportError, ValueError) as e:
     CVC_AVAILABLE = False
     GObject, GLib, Cvc = None, None, None
-    logging.warning(f"Could not import GObject/Cvc libraries: {e}. Audio monitoring will be disabled.")
-
-# Setup logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+    logger.warning(f"Could not import GObject/Cvc libraries: {e}. Audio monitoring will be disabled.")
 
 # --- Inotify Setup (unchanged) ---
 IN_MODIFY = 0x00000002
-IN_CLOSE_WRITE = 0x00000008
-IN_ATTRIB = 0x00000004
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ONLYDIR = 0x01000000
+POWER_SUPPLY_DIR = '/sys/class/power_supply'
+BACKLIGHT_DIR = '/sys/class/backlight'
+# Sysfs files are kept open for the service lifetime and re-read with pread()
+SYSFS_READ_SIZE = 64
+INOTIFY_READ_SIZE = 16384  # Room for many queued events per read()
+INOTIFY_DEBOUNCE_S = 0.1  # Refresh once, this long after the last event of a burst
+PERIODIC_REFRESH_S = 30.0
+# Entries in the battery/backlight directories whose IN_MODIFY marks that group dirty
+BATTERY_EVENT_NAMES = frozenset((b'capacity', b'status', b'time_to_empty', b'time_to_full', b'power_now', b'energy_now'))
+BACKLIGHT_EVENT_NAMES = frozenset((b'actual_brightness', b'brightness'))
+CLIENT_EPOLL_MASK = select.EPOLLIN | select.EPOLLRDHUP | select.EPOLLET
+COMMAND_MAX_SIZE = 1024
+PEERCRED_STRUCT = struct.Struct('3i')  # struct ucred: pid, uid, gid
 libc_path = ctypes.util.find_library('c')
 if not libc_path:
-    logging.error("libc not found, inotify will not work.")
+    logger.error("libc not found, inotify will not work.")
     libc = None
 else:
     libc = ctypes.CDLL(libc_path, use_errno=True)
 
-if libc:
-    class InotifyEvent(ctypes.Structure):
-        _fields_ = [('wd', ctypes.c_int), ('mask', ctypes.c_uint32), ('cookie', ctypes.c_uint32), ('len', ctypes.c_uint32)]
-    EVENT_HEADER_SIZE = ctypes.sizeof(InotifyEvent)
-else:
-    InotifyEvent, EVENT_HEADER_SIZE = None, 16
+# --- timerfd: one wakeup per wall-clock minute, also across suspend and clock changes ---
+CLOCK_REALTIME = 0
+TFD_TIMER_ABSTIME = 1 << 0
+TFD_TIMER_CANCEL_ON_SET = 1 << 1
+
+class _Timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+class _Itimerspec(ctypes.Structure):
+    _fields_ = [("it_interval", _Timespec), ("it_value", _Timespec)]
+
+def create_minute_timer():
+    """Return a nonblocking timerfd ticking on every minute boundary, or -1 if unavailable."""
+    if not libc:
+        return -1
+    fd = libc.timerfd_create(CLOCK_REALTIME, os.O_NONBLOCK | os.O_CLOEXEC)
+    if fd != -1 and not arm_minute_timer(fd):
+        os.close(fd)
+        fd = -1
+    return fd
+
+def arm_minute_timer(fd):
+    # Absolute deadline with a 60 s interval; CANCEL_ON_SET reports clock jumps as ECANCELED
+    spec = _Itimerspec(_Timespec(60, 0), _Timespec((int(time.time()) // 60 + 1) * 60, 0))
+    flags = TFD_TIMER_ABSTIME | TFD_TIMER_CANCEL_ON_SET
+    return libc.timerfd_settime(fd, flags, ctypes.byref(spec), None) == 0
+
+def get_time_fields():
+    """(hour, minute, day of month, month 1-12, weekday 0 = Monday); clients format the text"""
+    now = datetime.now()
+    return (now.hour, now.minute, now.day, now.month, now.weekday())
+
+def seconds_until_next_minute():
+    now = datetime.now()
+    # Small margin so the wakeup lands just after the minute flips
+    return 60 - now.second - now.microsecond / 1_000_000 + 0.05
+
+# struct inotify_event header: wd, mask, cookie, len (name follows)
+_EVENT_STRUCT = struct.Struct('iIII')
+EVENT_HEADER_SIZE = _EVENT_STRUCT.size
+
+def parse_inotify_events(buf, end=None):
+    """Yield (wd, mask, name) for every event packed in the first end bytes of an inotify read buffer."""
+    off, end = 0, len(buf) if end is None else end
+    while off + EVENT_HEADER_SIZE <= end:
+        wd, mask, _cookie, length = _EVENT_STRUCT.unpack_from(buf, off)
+        name_off = off + EVENT_HEADER_SIZE
+        yield wd, mask, bytes(buf[name_off:name_off + length]).rstrip(b'\0')
+        off = name_off + length
+
+# Fields broadcast to clients, in wire order
+STATE_KEYS = (
+    "battery_percentage", "is_charging", "battery_time_remaining",
+    "backlight_percentage", "volume_percentage",
+    "speaker_muted", "mic_muted", "time",
+)
+
+def encode_state(state: tuple) -> bytes:
+    """Serialize a state tuple (ordered as STATE_KEYS) into one SEQPACKET message."""
+    return _json_dumps(dict(zip(STATE_KEYS, state)))
 
 
 # ==============================================================================
@@ -63,24 +137,45 @@ if CVC_AVAILABLE:
         __gsignals__ = { 'changed': (GObject.SignalFlags.RUN_FIRST, None, ()) }
 
         # FIXED: Use Any type for dynamic types to avoid Pylance errors
-        def __init__(self, stream: Any, control: Any, **kwargs):
+        def __init__(self, stream: Any, control: Any, vol_max_norm: float, **kwargs):
             super().__init__(**kwargs)
             self._stream = stream
             self._control = control
-            self._stream.connect("notify::is-muted", self._on_prop_changed)
-            self._stream.connect("notify::volume", self._on_prop_changed)
+            self._vol_max_norm = vol_max_norm
+            self._connect_stream()
+
+        def _connect_stream(self):
+            self._handler_ids = (self._stream.connect("notify::is-muted", self._on_prop_changed),
+                                 self._stream.connect("notify::volume", self._on_prop_changed))
+
+        def release(self):
+            """Disconnect from the underlying Cvc stream."""
+            for handler_id in self._handler_ids: self._stream.disconnect(handler_id)
+            self._handler_ids = ()
+
+        def rebind(self, stream: Any):
+            """Point this wrapper at another Cvc stream, keeping connections made to it."""
+            if stream is self._stream: return
+            self.release()
+            self._stream = stream
+            self._connect_stream()
 
         def _on_prop_changed(self, _obj, _pspec): self.emit("changed")
         @GObject.Property(type=str, flags=GObject.ParamFlags.READABLE)
         def name(self) -> str: return self._stream.get_name()
         @GObject.Property(type=float, flags=GObject.ParamFlags.READABLE)
         def volume(self) -> float:
-            vol_max_norm = self._control.get_vol_max_norm()
-            if vol_max_norm == 0: return 0.0
-            return (self._stream.get_volume() / vol_max_norm) * 100
+            if self._vol_max_norm == 0: return 0.0
+            return (self._stream.get_volume() / self._vol_max_norm) * 100
         @GObject.Property(type=bool, default=False, flags=GObject.ParamFlags.READABLE)
         def muted(self) -> bool: return self._stream.get_is_muted()
 
+        def set_volume_percent(self, percent: float):
+            self._stream.set_volume(int(percent * self._vol_max_norm / 100))
+            self._stream.push_volume()
+
+        def set_muted(self, muted: bool): self._stream.change_is_muted(muted)
+
     class WirePlumberAudioService(GObject.Object):
         __gsignals__ = {
             'changed': (GObject.SignalFlags.RUN_FIRST, None, ()),
@@ -93,11 +188,11 @@ if CVC_AVAILABLE:
             super().__init__(**kwargs)
             # FIXED: Use Any type for dynamic types to avoid Pylance errors
             self._control: Any = Cvc.MixerControl(name="CombinedServiceMonitor")
+            # Constant for a given control; read once instead of on every volume lookup
+            self._vol_max_norm = float(self._control.get_vol_max_norm())
             self._streams: dict[int, AudioStream] = {}
             self._speaker: Optional[AudioStream] = None
             self._microphone: Optional[AudioStream] = None
-            self._speaker_handler_id: Optional[int] = None
-            self._mic_handler_id: Optional[int] = None
 
             self._control.connect("default-sink-changed", self._on_default_sink_changed)
             self._control.connect("default-source-changed", self._on_default_source_changed)
@@ -120,47 +215,41 @@ if CVC_AVAILABLE:
 
         def _on_stream_added(self, _, stream_id: int):
             stream = self._lookup_any_stream(stream_id)
-            if stream: self._streams[stream_id] = AudioStream(stream=stream, control=self._control)
+            if stream: self._streams[stream_id] = AudioStream(stream=stream, control=self._control, vol_max_norm=self._vol_max_norm)
 
         def _on_stream_removed(self, _, stream_id: int): self._streams.pop(stream_id, None)
 
         def _on_default_sink_changed(self, _, stream_id: int):
-            if self._speaker and self._speaker_handler_id:
-                try: self._speaker.disconnect(self._speaker_handler_id)
-                except TypeError: pass
-            
-            if stream_id == self.INVALID_STREAM_ID:
-                self._speaker = None
-                logger.info("Default sink has been unset (no device).")
-            else:
-                stream_obj = self._lookup_any_stream(stream_id)
-                if stream_obj:
-                    self._speaker = AudioStream(stream=stream_obj, control=self._control)
-                    self._speaker_handler_id = self._speaker.connect("changed", lambda _: self.emit("changed"))
-                    logger.info(f"Default sink changed to: {self._speaker.name}")
+            stream_obj = None if stream_id == self.INVALID_STREAM_ID else self._lookup_any_stream(stream_id)
+            if stream_obj:
+                # Reuse the wrapper so its "changed" connection survives the switch
+                if self._speaker: self._speaker.rebind(stream_obj)
                 else:
-                    self._speaker = None
-                    logger.warning(f"Default sink changed to ID {stream_id}, but stream could not be found.")
+                    self._speaker = AudioStream(stream=stream_obj, control=self._control, vol_max_norm=self._vol_max_norm)
+                    self._speaker.connect("changed", lambda _: self.emit("changed"))
+                logger.info(f"Default sink changed to: {self._speaker.name}")
+            else:
+                if self._speaker: self._speaker.release()
+                self._speaker = None
+                if stream_id == self.INVALID_STREAM_ID: logger.info("Default sink has been unset (no device).")
+                else: logger.warning(f"Default sink changed to ID {stream_id}, but stream could not be found.")
             self.emit("speaker-changed"); self.emit("changed")
 
         def _on_default_source_changed(self, _, stream_id: int):
-            if self._microphone and self._mic_handler_id:
-                try: self._microphone.disconnect(self._mic_handler_id)
-                except TypeError: pass
-            if stream_id == self.INVALID_STREAM_ID:
-                self._microphone = None
-                logger.info("Default source has been unset (no device).")
-            else:
-                stream_obj = self._lookup_any_stream(stream_id)
-                if stream_obj:
-                    self._microphone = AudioStream(stream=stream_obj, control=self._control)
-                    self._mic_handler_id = self._microphone.connect("changed", lambda _: self.emit("changed"))
-                    logger.info(f"Default source changed to: {self._microphone.name}")
+            stream_obj = None if stream_id == self.INVALID_STREAM_ID else self._lookup_any_stream(stream_id)
+            if stream_obj:
+                if self._microphone: self._microphone.rebind(stream_obj)
                 else:
-                    self._microphone = None
-                    logger.warning(f"Default source changed to ID {stream_id}, but stream could not be found.")
+                    self._microphone = AudioStream(stream=stream_obj, control=self._control, vol_max_norm=self._vol_max_norm)
+                    self._microphone.connect("changed", lambda _: self.emit("changed"))
+                logger.info(f"Default source changed to: {self._microphone.name}")
+            else:
+                if self._microphone: self._microphone.release()
+                self._microphone = None
+                if stream_id == self.INVALID_STREAM_ID: logger.info("Default source has been unset (no device).")
+                else: logger.warning(f"Default source changed to ID {stream_id}, but stream could not be found.")
             self.emit("microphone-changed"); self.emit("changed")
-            
+
         def cleanup(self):
             logger.info("Closing Cvc.MixerControl...")
             if self._control: self._control.close()
@@ -169,248 +258,264 @@ if CVC_AVAILABLE:
 
 class CombinedService:
     def __init__(self):
-        self.socket_path = "/tmp/combined_service.sock"
-        self.current_data = {
-            "battery_percentage": None, "is_charging": False, "battery_time_remaining": None,
-            "backlight_percentage": None, "volume_percentage": None,
-            "speaker_muted": None, "mic_muted": None
-        }
-        self.clients, self.running, self.data_lock = [], True, threading.Lock()
-        self.audio_service, self.glib_thread, self.main_loop = None, None, None
+        # Abstract-namespace address: no filesystem entry to look up, create or unlink
+        self.socket_path = "\0combined_service"
+        # Keys stay in STATE_KEYS order, so values() is already the wire order
+        self.current_data = dict.fromkeys(STATE_KEYS)
+        self.current_data["is_charging"] = False
+        self.current_data["time"] = get_time_fields()
+        # Encoded current_data, republished after every change. Immutable
+        # bytes are the snapshot; no dict copy is kept alongside.
+        self._snapshot_bytes: bytes = encode_state(tuple(self.current_data.values()))
+        self.running = True
+        # Client sockets by fd; only the event loop thread touches this
+        self.clients: dict[int, socket.socket] = {}
+        self._pending_sends: dict[int, bytes] = {}  # fd -> snapshot waiting for EPOLLOUT
+        self.audio_service, self.main_loop = None, None
         self.inotify_fd = -1
+        self._time_fd = create_minute_timer()
+        self._epoll = None
+        # The event loop thread is the only writer of current_data; stop() pokes this eventfd to wake it
+        self._wake_efd = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+        self._power_supply_wd = -1
+        self._file_wds: list[int] = []
+        self._battery_wd = self._backlight_wd = -1
+        self._battery_dirty = self._backlight_dirty = False
+        self._inotify_buf = bytearray(INOTIFY_READ_SIZE)  # Reused by every inotify read
+        self._power_supplies: list[str] = self._scan_power_supplies()
         self.battery_files = self._find_and_debug_battery_files()
         self.backlight_brightness_file, self.backlight_max_brightness_file = self._find_backlight_files()
-        self.last_battery_update = 0  # Track when we last updated battery time
+        # actual_brightness is what gets displayed; steps read and write the requested level in brightness
+        self.backlight_set_file = os.path.join(os.path.dirname(self.backlight_brightness_file), 'brightness') if self.backlight_brightness_file else None
+        self._fds: dict[str, int] = {}  # sysfs path -> open fd
+        self._open_sysfs_fds()
+        self._rate_key, self._level_key, self._full_level = self._select_time_source()
         
-        if os.path.exists(self.socket_path):
-            try: os.unlink(self.socket_path)
-            except OSError: pass
-        self.server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # SEQPACKET keeps message boundaries, so clients need no framing
+        self.server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET | socket.SOCK_CLOEXEC)
         try:
             self.server_socket.bind(self.socket_path); self.server_socket.listen(5)
+            self.server_socket.setblocking(False)
         except Exception as e:
             logger.error(f"Failed to bind/listen on socket: {e}"); self.running = False; return
         signal.signal(signal.SIGTERM, self.signal_handler); signal.signal(signal.SIGINT, self.signal_handler)
         self.init_audio_monitoring()
         self.update_file_data_and_notify()
         self.setup_inotify_watches()
-        logger.info(f"Combined service started, socket: {self.socket_path}")
+        logger.info(f"Combined service started, socket: @{self.socket_path[1:]}")
 
     def signal_handler(self, signum, frame):
         logger.info("Shutting down combined service (signal received)...")
+        self.stop()
+
+    def stop(self):
+        """Ask the event loop to exit; safe from signal handlers and other threads."""
         self.running = False
-        if self.main_loop and self.main_loop.is_running(): self.main_loop.quit()
+        os.eventfd_write(self._wake_efd, 1)  # Wake the reactor so it sees running=False
 
     def init_audio_monitoring(self):
         global CVC_AVAILABLE
-        if not CVC_AVAILABLE:
+        if CVC_AVAILABLE:
+            try:
+                logger.info("Initializing WirePlumber/Cvc audio monitoring...")
+                # The loop itself is run by event_loop, on the reactor thread
+                self.main_loop = GLib.MainLoop()
+                self.audio_service = WirePlumberAudioService()
+                self.audio_service.connect("changed", self._on_audio_state_changed)
+                GLib.idle_add(self._on_audio_state_changed, self)
+                return
+            except Exception as e:
+                logger.error(f"Failed to initialize Cvc audio monitoring: {e}", exc_info=True)
+                CVC_AVAILABLE, self.audio_service, self.main_loop = False, None, None
+        else:
             logger.warning("Cvc library not available. Audio status will be placeholders.")
-            with self.data_lock: self.current_data.update({"volume_percentage": 70, "speaker_muted": False, "mic_muted": False})
-            return
-        try:
-            logger.info("Initializing WirePlumber/Cvc audio monitoring...")
-            self.main_loop = GLib.MainLoop()
-            self.glib_thread = threading.Thread(target=self.main_loop.run, daemon=True)
-            self.audio_service = WirePlumberAudioService()
-            self.audio_service.connect("changed", self._on_audio_state_changed)
-            self.glib_thread.start()
-            logger.info("GObject/GLib main loop thread started for audio events.")
-            GLib.idle_add(self._on_audio_state_changed, self)
-        except Exception as e:
-            logger.error(f"Failed to initialize Cvc audio monitoring: {e}", exc_info=True)
-            if self.main_loop and self.main_loop.is_running(): self.main_loop.quit()
-            CVC_AVAILABLE, self.audio_service = False, None
-            self.init_audio_monitoring()
+        self._apply_changes({"volume_percentage": 70, "speaker_muted": False, "mic_muted": False})
 
     def _on_audio_state_changed(self, *args):
-        data_changed = False
+        """Runs on the reactor thread (GLib dispatch), so it applies the fields directly."""
         if not self.audio_service: return GLib.SOURCE_REMOVE
-        with self.data_lock:
-            speaker = self.audio_service.speaker
-            new_volume = int(speaker.volume) if speaker else self.current_data['volume_percentage']
-            new_speaker_muted = speaker.muted if speaker else self.current_data['speaker_muted']
-            if self.current_data['volume_percentage'] != new_volume: self.current_data['volume_percentage'], data_changed = new_volume, True
-            if self.current_data['speaker_muted'] != new_speaker_muted: self.current_data['speaker_muted'], data_changed = new_speaker_muted, True
-
-            mic = self.audio_service.microphone
-            new_mic_muted = mic.muted if mic else self.current_data['mic_muted']
-            if self.current_data['mic_muted'] != new_mic_muted: self.current_data['mic_muted'], data_changed = new_mic_muted, True
-        if data_changed: self.notify_clients()
+        delta = {}
+        speaker = self.audio_service.speaker
+        if speaker: delta['volume_percentage'], delta['speaker_muted'] = int(speaker.volume), speaker.muted
+        mic = self.audio_service.microphone
+        if mic: delta['mic_muted'] = mic.muted
+        if delta: self._apply_changes(delta)
         return GLib.SOURCE_REMOVE
 
+    def _scan_power_supplies(self):
+        """Enumerate /sys/class/power_supply once; refreshed only on inotify create/delete"""
+        try:
+            return sorted(entry.path for entry in os.scandir(POWER_SUPPLY_DIR))
+        except OSError as e:
+            logger.error(f"Could not list {POWER_SUPPLY_DIR}: {e}")
+            return []
+
     def _find_and_debug_battery_files(self):
-        """Find battery files and print detailed debug info about what exists"""
-        paths = glob.glob('/sys/class/power_supply/BAT*')
+        """Find battery files; with --debug, also dump what each one contains"""
+        paths = [p for p in self._power_supplies if os.path.basename(p).startswith('BAT')]
         if not paths: 
             logger.error("No battery found at /sys/class/power_supply/BAT*")
             return {}
             
         base_path = paths[0]
-        logger.info(f"=== BATTERY DEBUG INFO ===")
         logger.info(f"Battery path: {base_path}")
-        
-        # List all files in the battery directory
         try:
-            all_files = os.listdir(base_path)
-            logger.info(f"All files in {base_path}: {sorted(all_files)}")
+            present = set(os.listdir(base_path))
         except OSError as e:
             logger.error(f"Could not list files in {base_path}: {e}")
             return {}
         
-        files = {}
         file_names = [
             'capacity', 'status', 'time_to_empty', 'time_to_full',
             'power_now', 'energy_now', 'energy_full', 'energy_full_design',
             'charge_now', 'charge_full', 'current_now'
         ]
+        files = {name: os.path.join(base_path, name) if name in present else None for name in file_names}
         
-        for name in file_names:
-            file_path = os.path.join(base_path, name)
-            exists = os.path.exists(file_path)
-            files[name] = file_path if exists else None
-            
-            if exists:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"All files in {base_path}: {sorted(present)}")
+            for name, file_path in files.items():
+                if not file_path:
+                    logger.debug(f"✗ {name}: does not exist"); continue
                 try:
-                    with open(file_path, 'r') as f:
-                        content = f.read().strip()
-                    logger.info(f"✓ {name}: {content}")
-                except Exception as e:
-                    logger.info(f"✗ {name}: exists but unreadable - {e}")
-            else:
-                logger.info(f"✗ {name}: does not exist")
-        
-        logger.info("=== END BATTERY DEBUG ===")
+                    with open(file_path, 'r') as f: logger.debug(f"✓ {name}: {f.read().strip()}")
+                except OSError as e:
+                    logger.debug(f"✗ {name}: exists but unreadable - {e}")
         return files
 
-    def _find_backlight_files(self):
-        paths = glob.glob('/sys/class/backlight/*'); return (None, None) if not paths else (os.path.join(paths[0], 'actual_brightness'), os.path.join(paths[0], 'max_brightness'))
+    def _open_sysfs_fds(self):
+        """Open every battery/backlight file once so each read is a single pread()"""
+        paths = [*self.battery_files.values(), self.backlight_brightness_file, self.backlight_max_brightness_file, self.backlight_set_file]
+        for path in paths:
+            if not path or path in self._fds: continue
+            try: self._fds[path] = os.open(path, os.O_RDONLY | os.O_CLOEXEC | os.O_NONBLOCK)
+            except OSError as e: logger.debug(f"Could not open {path}: {e}")
+
+    def _close_sysfs_fds(self):
+        for fd in self._fds.values():
+            try: os.close(fd)
+            except OSError: pass
+        self._fds.clear()
 
-    def _parse_battery_status(self, status_str):
-        """Parse battery status string and return charging state"""
-        status_clean = status_str.strip().lower()
-        
-        # Log the exact status for debugging
-        logger.info(f"Raw battery status: '{status_str}' -> cleaned: '{status_clean}'")
-        
-        # Define charging states - be very explicit
-        charging_states = ['charging']
-        discharging_states = ['discharging', 'not charging']
-        full_states = ['full', 'unknown']
-        
-        is_charging = False
-        is_discharging = False
-        
-        for state in charging_states:
-            if state in status_clean:
-                is_charging = True
-                break
-                
-        for state in discharging_states:
-            if state in status_clean:
-                is_discharging = True
-                break
-        
-        # Log the decision process
-        logger.info(f"Status analysis: charging={is_charging}, discharging={is_discharging}")
-        
-        # Return True only if explicitly charging, False for everything else
-        return is_charging and not is_discharging
+    def _read_sysfs(self, path):
+        """Return the raw bytes of a sysfs file, via its cached fd when available; int() accepts them as-is"""
+        fd = self._fds.get(path)
+        if fd is not None:
+            return os.pread(fd, SYSFS_READ_SIZE, 0)
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def _read_battery_file(self, name):
+        return self._read_sysfs(self.battery_files[name])
 
-    def _calculate_time_from_files(self, files, is_charging, status_str):
-        """Try multiple methods to calculate battery time"""
+    def _find_backlight_files(self):
+        try:
+            with os.scandir(BACKLIGHT_DIR) as entries: path = next((entry.path for entry in entries), None)
+        except OSError: path = None
+        return (None, None) if not path else (os.path.join(path, 'actual_brightness'), os.path.join(path, 'max_brightness'))
+
+    @staticmethod
+    def _parse_battery_status(status: bytes) -> bool:
+        """True only for "Charging"; Discharging, Not charging, Full and Unknown all read as False"""
+        return status.startswith(b'Charging')
+
+    def _select_time_source(self):
+        """
+        Pick the rate/level file pair used to estimate battery time: power/energy
+        when present, else current/charge on older systems. The matching full
+        level is a design constant, so it is read once here, not on every tick.
+        """
+        files = self.battery_files
+        for rate_key, level_key, full_key in (('power_now', 'energy_now', 'energy_full'),
+                                              ('current_now', 'charge_now', 'charge_full')):
+            if files.get(rate_key) and files.get(level_key):
+                full_level = None
+                if files.get(full_key):
+                    try: full_level = int(self._read_battery_file(full_key))
+                    except (OSError, ValueError) as e: logger.debug(f"Failed to read {full_key}: {e}")
+                return rate_key, level_key, full_level
+        return None, None, None
+
+    def _calculate_time_from_files(self, files, is_charging, is_discharging):
+        """Battery time from the kernel's time_to_* files, else from the rate/level estimate"""
         
         # Method 1: Direct time files
-        time_file_key = 'time_to_full' if is_charging else 'time_to_empty' if 'discharging' in status_str else None
+        time_file_key = 'time_to_full' if is_charging else 'time_to_empty' if is_discharging else None
         if time_file_key and files.get(time_file_key):
             try:
-                with open(files[time_file_key], 'r') as f:
-                    time_seconds = int(f.read().strip())
-                    if time_seconds > 0:
-                        logger.debug(f"Got time from {time_file_key}: {time_seconds}s")
-                        return time_seconds
+                time_seconds = int(self._read_battery_file(time_file_key))
+                if time_seconds > 0:
+                    logger.debug(f"Got time from {time_file_key}: {time_seconds}s")
+                    return time_seconds
             except Exception as e:
                 logger.debug(f"Failed to read {time_file_key}: {e}")
         
-        # Method 2: power_now + energy files
-        if files.get('power_now') and files.get('energy_now'):
-            try:
-                with open(files['power_now'], 'r') as f:
-                    power_now = int(f.read().strip())
-                with open(files['energy_now'], 'r') as f:
-                    energy_now = int(f.read().strip())
-                
-                if power_now > 0:
-                    if is_charging and files.get('energy_full'):
-                        with open(files['energy_full'], 'r') as f:
-                            energy_full = int(f.read().strip())
-                        time_seconds = int(((energy_full - energy_now) / power_now) * 3600)
-                        logger.debug(f"Calculated charging time from power/energy: {time_seconds}s")
-                        return time_seconds if time_seconds > 0 else None
-                    elif not is_charging:
-                        time_seconds = int((energy_now / power_now) * 3600)
-                        logger.debug(f"Calculated discharge time from power/energy: {time_seconds}s")
-                        return time_seconds if time_seconds > 0 else None
-            except Exception as e:
-                logger.debug(f"Failed power/energy calculation: {e}")
-        
-        # Method 3: current_now + charge files (older systems)
-        if files.get('current_now') and files.get('charge_now'):
-            try:
-                with open(files['current_now'], 'r') as f:
-                    current_now = int(f.read().strip())
-                with open(files['charge_now'], 'r') as f:
-                    charge_now = int(f.read().strip())
-                
-                if current_now > 0:
-                    if is_charging and files.get('charge_full'):
-                        with open(files['charge_full'], 'r') as f:
-                            charge_full = int(f.read().strip())
-                        time_seconds = int(((charge_full - charge_now) / current_now) * 3600)
-                        logger.debug(f"Calculated charging time from current/charge: {time_seconds}s")
-                        return time_seconds if time_seconds > 0 else None
-                    elif not is_charging:
-                        time_seconds = int((charge_now / current_now) * 3600)
-                        logger.debug(f"Calculated discharge time from current/charge: {time_seconds}s")
-                        return time_seconds if time_seconds > 0 else None
-            except Exception as e:
-                logger.debug(f"Failed current/charge calculation: {e}")
-        
+        # Fallback: estimate from the rate and level picked by _select_time_source
+        if not self._level_key or (is_charging and self._full_level is None):
+            return None
+        try:
+            rate = int(self._read_battery_file(self._rate_key))
+            level = int(self._read_battery_file(self._level_key))
+            remaining = self._full_level - level if is_charging else level
+            time_seconds = int(remaining * 3600 / rate)
+            logger.debug(f"Calculated time from {self._rate_key}/{self._level_key}: {time_seconds}s")
+            return time_seconds if time_seconds > 0 else None
+        except (OSError, ValueError, ZeroDivisionError) as e:
+            logger.debug(f"Failed {self._rate_key}/{self._level_key} calculation: {e}")
+
         logger.debug("Could not calculate battery time using any method")
         return None
 
     def setup_inotify_watches(self):
-        if not libc or not InotifyEvent: return
+        if not libc: return
         self.inotify_fd = libc.inotify_init1(os.O_NONBLOCK)
         if self.inotify_fd == -1: return
-        files_to_watch = [f for f in [
-            self.battery_files.get('capacity'), self.battery_files.get('status'),
-            self.backlight_brightness_file, self.battery_files.get('time_to_empty'), 
-            self.battery_files.get('time_to_full'), self.battery_files.get('power_now'),
-            self.battery_files.get('energy_now')
-        ] if f and os.path.exists(f)]
-        for f_path in files_to_watch: libc.inotify_add_watch(self.inotify_fd, f_path.encode('utf-8'), IN_MODIFY | IN_CLOSE_WRITE | IN_ATTRIB)
+        # Directory watch only tells us when supplies appear or disappear
+        self._power_supply_wd = libc.inotify_add_watch(self.inotify_fd, POWER_SUPPLY_DIR.encode('utf-8'), IN_CREATE | IN_DELETE)
+        self._add_file_watches()
+
+    def _add_file_watches(self):
+        """One watch per battery/backlight directory; events are told apart by name."""
+        self._battery_wd = self._backlight_wd = -1
+        if self.battery_files.get('capacity'):
+            self._battery_wd = self._add_dir_watch(os.path.dirname(self.battery_files['capacity']))
+        if self.backlight_brightness_file:
+            self._backlight_wd = self._add_dir_watch(os.path.dirname(self.backlight_brightness_file))
+
+    def _add_dir_watch(self, path):
+        wd = libc.inotify_add_watch(self.inotify_fd, path.encode('utf-8'), IN_MODIFY | IN_ONLYDIR)
+        if wd != -1: self._file_wds.append(wd)
+        return wd
+
+    def _refresh_power_supplies(self):
+        """A power supply was added or removed: re-enumerate and re-watch its files."""
+        logger.info("Power supply set changed, rescanning.")
+        for wd in self._file_wds: libc.inotify_rm_watch(self.inotify_fd, wd)
+        self._file_wds.clear()
+        self._power_supplies = self._scan_power_supplies()
+        self._close_sysfs_fds()
+        self.battery_files = self._find_and_debug_battery_files()
+        self._open_sysfs_fds()
+        self._rate_key, self._level_key, self._full_level = self._select_time_source()
+        self._add_file_watches()
 
     def get_battery_info_internal(self):
         if not self.battery_files.get('capacity') or not self.battery_files.get('status'):
             return None, False, None
             
         try:
-            with open(self.battery_files['capacity'], 'r') as f: 
-                capacity = int(f.read().strip())
-            with open(self.battery_files['status'], 'r') as f: 
-                status_str = f.read().strip()
-                
-            # Use the improved status parsing
-            is_charging = self._parse_battery_status(status_str)
-            
-            logger.info(f"Battery: {capacity}%, status: '{status_str}', charging: {is_charging}")
-            
+            capacity = int(self._read_battery_file('capacity'))
+            status = self._read_battery_file('status')
+            is_charging = self._parse_battery_status(status)
+            is_discharging = status.startswith(b'Discharging')
+
             # Calculate time remaining
             time_remaining = None
-            if is_charging or 'discharging' in status_str.lower():
-                time_remaining = self._calculate_time_from_files(self.battery_files, is_charging, status_str.lower())
-            
-            logger.info(f"Final battery data: {capacity}%, charging: {is_charging}, time: {time_remaining}s")
+            if is_charging or is_discharging:
+                time_remaining = self._calculate_time_from_files(self.battery_files, is_charging, is_discharging)
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Battery: {capacity}%, status: {status.strip()!r}, charging: {is_charging}, time: {time_remaining}s")
             return capacity, is_charging, time_remaining
             
         except Exception as e:
@@ -420,128 +525,339 @@ class CombinedService:
     def get_backlight_percentage_internal(self):
         try:
             if not all([self.backlight_brightness_file, self.backlight_max_brightness_file]): return None
-            with open(self.backlight_brightness_file, 'r') as f: current = int(f.read().strip())
-            with open(self.backlight_max_brightness_file, 'r') as f: max_val = int(f.read().strip())
+            current = int(self._read_sysfs(self.backlight_brightness_file))
+            max_val = int(self._read_sysfs(self.backlight_max_brightness_file))
             return int((current / max_val) * 100) if max_val > 0 else 0
         except (IOError, ValueError): return None
 
-    def update_file_data_and_notify(self, force_battery_update=False):
-        current_time = time.time()
-        
-        # Always update backlight
-        backlight_percent = self.get_backlight_percentage_internal()
-        
-        # Update battery info if forced or if 30 seconds have passed
-        should_update_battery = force_battery_update or (current_time - self.last_battery_update) >= 30
-        
-        if should_update_battery:
+    def update_file_data_and_notify(self, battery=True, backlight=True):
+        """Re-read the requested groups of sysfs files and broadcast if anything changed."""
+        changes = {}
+        if backlight:
+            changes["backlight_percentage"] = self.get_backlight_percentage_internal()
+        if battery:
             bat_percent, is_charging, time_rem = self.get_battery_info_internal()
-            self.last_battery_update = current_time
-        else:
-            # Keep existing battery values
-            with self.data_lock:
-                bat_percent = self.current_data["battery_percentage"]
-                is_charging = self.current_data["is_charging"]
-                time_rem = self.current_data["battery_time_remaining"]
-        
-        data_changed = False
-        
-        with self.data_lock:
-            if self.current_data["battery_percentage"] != bat_percent: self.current_data["battery_percentage"], data_changed = bat_percent, True
-            if self.current_data["is_charging"] != is_charging: self.current_data["is_charging"], data_changed = is_charging, True
-            if self.current_data["battery_time_remaining"] != time_rem: self.current_data["battery_time_remaining"], data_changed = time_rem, True
-            if self.current_data["backlight_percentage"] != backlight_percent: self.current_data["backlight_percentage"], data_changed = backlight_percent, True
-        
-        if data_changed: 
-            if should_update_battery:
-                logger.info(f"Sending update: {bat_percent}%, charging: {is_charging}, time: {time_rem}s")
-            self.notify_clients()
+            changes.update(battery_percentage=bat_percent, is_charging=is_charging, battery_time_remaining=time_rem)
 
-    def inotify_event_loop(self):
-        if self.inotify_fd == -1:
-            # Fallback mode - check every 30 seconds for battery updates
-            while self.running: 
-                time.sleep(30)
-                if self.running:
-                    self.update_file_data_and_notify(force_battery_update=True)
-            return
-            
+        if self._apply_changes(changes) and battery:
+            logger.debug(f"Sending update: {bat_percent}%, charging: {is_charging}, time: {time_rem}s")
+
+    def event_loop(self):
+        """Single reactor: accepts clients, reads inotify, applies updates, and refreshes on deadlines."""
+        self._epoll = select.epoll()
+        self._epoll.register(self._wake_efd, select.EPOLLIN)
+        self._epoll.register(self.server_socket.fileno(), select.EPOLLIN)
+        if self.inotify_fd != -1:
+            # Edge-triggered: one wakeup per burst, then drain until EAGAIN
+            self._epoll.register(self.inotify_fd, select.EPOLLIN | select.EPOLLET)
+        if self._time_fd != -1:
+            self._epoll.register(self._time_fd, select.EPOLLIN)
+            self._next_minute = None
+        else:
+            logger.warning("timerfd unavailable, falling back to epoll timeouts for the clock")
+            self._next_minute = time.monotonic() + seconds_until_next_minute()
+        # Without inotify this still wakes every 30 seconds for battery updates
+        self._next_periodic = time.monotonic() + PERIODIC_REFRESH_S
+        self._pending_refresh = None  # Deadline of a debounced inotify refresh
+        if self.main_loop:
+            self._run_glib_reactor(); return
         while self.running:
             try:
-                rlist, _, _ = select.select([self.inotify_fd], [], [], 30.0)  # 30 second timeout
-                if not self.running: break
-                
-                if self.inotify_fd in rlist: 
-                    os.read(self.inotify_fd, 4096)
-                    self.update_file_data_and_notify(force_battery_update=True)
-                else:
-                    # Timeout - periodic battery update
-                    self.update_file_data_and_notify(force_battery_update=True)
-                    
+                self._reactor_step(self._next_timeout())
             except OSError as e:
-                if e.errno != errno.EINTR: logger.error(f"Inotify loop error: {e}")
+                if e.errno != errno.EINTR: logger.error(f"Event loop error: {e}")
+
+    def _next_timeout(self):
+        deadline = self._next_periodic if self._pending_refresh is None else min(self._next_periodic, self._pending_refresh)
+        if self._next_minute is not None: deadline = min(deadline, self._next_minute)
+        return max(0.0, deadline - time.monotonic())
+
+    def _reactor_step(self, timeout):
+        """Wait up to timeout seconds for epoll events, dispatch them, then run any due refresh."""
+        events = self._epoll.poll(timeout)
+        if not self.running: return
+
+        for fd, mask in events:
+            if fd == self._wake_efd:
+                try: os.eventfd_read(self._wake_efd)
+                except BlockingIOError: pass
+            elif fd == self.server_socket.fileno():
+                self.accept_clients()
+            elif fd == self.inotify_fd:
+                if self._drain_inotify():
+                    self._pending_refresh = time.monotonic() + INOTIFY_DEBOUNCE_S
+            elif fd == self._time_fd:
+                self._on_minute_timer()
+            elif fd in self.clients:
+                self._handle_client_event(fd, mask)
+        now = time.monotonic()
+        if self._next_minute is not None and now >= self._next_minute:
+            self._next_minute = now + seconds_until_next_minute()
+            self._apply_changes({"time": get_time_fields()})
+        if now >= self._next_periodic:
+            self._pending_refresh, self._next_periodic = None, now + PERIODIC_REFRESH_S
+            self._battery_dirty = self._backlight_dirty = False
+            self.update_file_data_and_notify()
+        elif self._pending_refresh is not None and now >= self._pending_refresh:
+            self._pending_refresh = None
+            # Only the groups whose files changed during the burst
+            self.update_file_data_and_notify(battery=self._battery_dirty, backlight=self._backlight_dirty)
+            self._battery_dirty = self._backlight_dirty = False
+
+    def _on_minute_timer(self):
+        try:
+            os.read(self._time_fd, 8) # Expiration count; drained so the fd stops polling readable
+        except BlockingIOError:
+            return
+        except OSError as e:
+            if e.errno != errno.ECANCELED: raise
+            arm_minute_timer(self._time_fd) # Wall clock was set; realign to the new minute boundary
+        self._apply_changes({"time": get_time_fields()})
+
+    def _run_glib_reactor(self):
+        """
+        Audio events need a GLib main loop, so it owns this thread: the epoll fd is
+        readable whenever one of our fds is, and a one-shot timer covers the deadlines.
+        """
+        self._timer_id = None
+        GLib.unix_fd_add_full(GLib.PRIORITY_DEFAULT, self._epoll.fileno(), GLib.IOCondition.IN, self._on_glib_wakeup)
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            GLib.unix_signal_add(GLib.PRIORITY_HIGH, signum, self._on_glib_signal)
+        self._arm_glib_timer()
+        self.main_loop.run()
+
+    def _on_glib_wakeup(self, *_args):
+        try:
+            self._reactor_step(0)
+        except OSError as e:
+            if e.errno != errno.EINTR: logger.error(f"Event loop error: {e}")
+        if not self.running:
+            self.main_loop.quit(); return GLib.SOURCE_REMOVE
+        self._arm_glib_timer()
+        return GLib.SOURCE_CONTINUE
+
+    def _on_glib_timer(self):
+        self._timer_id = None
+        self._on_glib_wakeup()
+        return GLib.SOURCE_REMOVE
+
+    def _arm_glib_timer(self):
+        if self._timer_id: GLib.source_remove(self._timer_id)
+        # Round up so the timer never fires just before the deadline
+        self._timer_id = GLib.timeout_add(int(self._next_timeout() * 1000) + 1, self._on_glib_timer)
+
+    def _on_glib_signal(self):
+        logger.info("Shutting down combined service (signal received)...")
+        self.stop()
+        return GLib.SOURCE_REMOVE
+
+    def _drain_inotify(self):
+        """Read every pending inotify event and mark the affected groups dirty; True if any were."""
+        rescan = False
+        while True:
+            try:
+                n = os.readv(self.inotify_fd, (self._inotify_buf,))
+            except BlockingIOError:
+                break
+            if not n:
+                break
+            for wd, mask, name in parse_inotify_events(self._inotify_buf, n):
+                if wd == self._power_supply_wd:
+                    if mask & (IN_CREATE | IN_DELETE): rescan = True
+                elif wd == self._battery_wd:
+                    if name in BATTERY_EVENT_NAMES: self._battery_dirty = True
+                elif wd == self._backlight_wd:
+                    if name in BACKLIGHT_EVENT_NAMES: self._backlight_dirty = True
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"inotify event: wd={wd} mask={mask:#x} name={name!r}")
+        if rescan:
+            self._refresh_power_supplies()
+            self._battery_dirty = True
+        return self._battery_dirty or self._backlight_dirty
+
+    def _apply_changes(self, changes):
+        """Merge changed fields into current_data and broadcast; event loop thread only."""
+        current = self.current_data
+        changed = False
+        for key, value in changes.items():
+            if current[key] != value: current[key], changed = value, True
+        if changed:
+            self._snapshot_bytes = encode_state(tuple(current.values()))
+            self.notify_clients()
+        return changed
 
     def notify_clients(self):
-        with self.data_lock: data_to_send, clients_to_notify = self.current_data.copy(), list(self.clients)
-        message = json.dumps(data_to_send) + "\n"; disconnected_clients = []
-        for client_socket in clients_to_notify:
-            try: client_socket.sendall(message.encode('utf-8'))
-            except socket.error: disconnected_clients.append(client_socket)
-        if disconnected_clients:
-            with self.data_lock:
-                for client in disconnected_clients:
-                    if client in self.clients: self.clients.remove(client); client.close()
-
-    def handle_client(self, client_socket):
-        with self.data_lock: initial_message = json.dumps(self.current_data) + "\n"
+        self._broadcast(self._snapshot_bytes)
+
+    def _broadcast(self, payload):
+        # Same bytes object goes to every subscriber; a full socket never blocks the loop
+        disconnected = [fd for fd, client_socket in self.clients.items() if not self._send_to(fd, client_socket, payload)]
+        for fd in disconnected: self._drop_client(fd)
+
+    def _send_to(self, fd, client_socket, payload):
+        """Nonblocking send; on EAGAIN park the payload until EPOLLOUT. Returns False if the client is gone."""
+        if fd in self._pending_sends:
+            # Still waiting for room: every payload is a full snapshot, so the newest replaces the old
+            self._pending_sends[fd] = payload
+            return True
         try:
-            client_socket.sendall(initial_message.encode('utf-8'))
-            while self.running and client_socket.fileno() != -1:
-                if not client_socket.recv(1024): break
-        finally:
-            with self.data_lock:
-                if client_socket in self.clients: self.clients.remove(client_socket)
-            try: client_socket.close()
-            except: pass
+            client_socket.send(payload, socket.MSG_DONTWAIT)
+        except BlockingIOError:
+            self._pending_sends[fd] = payload
+            self._epoll.modify(fd, CLIENT_EPOLL_MASK | select.EPOLLOUT)
+        except OSError:
+            return False
+        return True
+
+    def _flush_pending(self, fd, client_socket):
+        try:
+            client_socket.send(self._pending_sends[fd], socket.MSG_DONTWAIT)
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        del self._pending_sends[fd]
+        self._epoll.modify(fd, CLIENT_EPOLL_MASK)
+        return True
+
+    def _drop_client(self, fd):
+        client_socket = self.clients.pop(fd, None)
+        if client_socket is None: return
+        self._pending_sends.pop(fd, None)
+        try: self._epoll.unregister(fd)
+        except OSError: pass
+        client_socket.close()
+
+    def _handle_client_event(self, fd, mask):
+        """Flush a parked snapshot on EPOLLOUT; read commands on EPOLLIN; drop on hangup."""
+        if mask & (select.EPOLLRDHUP | select.EPOLLHUP | select.EPOLLERR):
+            self._drop_client(fd); return
+        client_socket = self.clients[fd]
+        if mask & select.EPOLLOUT and fd in self._pending_sends:
+            if not self._flush_pending(fd, client_socket):
+                self._drop_client(fd); return
+        if not mask & select.EPOLLIN: return
+        while True:  # Edge-triggered: drain until EAGAIN
+            try:
+                message = client_socket.recv(COMMAND_MAX_SIZE)
+            except BlockingIOError:
+                return
+            except OSError:
+                break
+            if not message: break
+            self._handle_command(message)
+        self._drop_client(fd)
+
+    def _handle_command(self, message):
+        """Run one client command, e.g. {"cmd": "volume", "delta": 5}; one SEQPACKET message each."""
+        try:
+            command = json.loads(message)
+            handler = self._COMMANDS[command["cmd"]]
+        except (ValueError, KeyError, TypeError) as e:
+            logger.debug(f"Ignoring bad command {message!r}: {e}"); return
+        try: handler(self, command)
+        except Exception as e: logger.error(f"Command {command['cmd']} failed: {e}")
+
+    @staticmethod
+    def _spawn_cli(argv):
+        """Fire-and-forget a CLI tool for commands the service cannot handle in-process."""
+        try: subprocess.Popen(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError as e: logger.error(f"Failed to run {argv[0]}: {e}")
+
+    # Without Cvc (or before a default device appears) audio goes through pamixer/wpctl,
+    # the same tools the bar used before volume control moved into the service
+    def _cmd_volume(self, command):
+        speaker = self.audio_service.speaker if self.audio_service else None
+        delta = int(command["delta"])
+        if speaker: speaker.set_volume_percent(max(0, min(100, round(speaker.volume) + delta)))
+        elif delta: self._spawn_cli(['pamixer', '-i' if delta > 0 else '-d', str(abs(delta))])
+
+    def _cmd_toggle_mute(self, _command):
+        speaker = self.audio_service.speaker if self.audio_service else None
+        if speaker: speaker.set_muted(not speaker.muted)
+        else: self._spawn_cli(['pamixer', '--toggle-mute'])
+
+    def _cmd_toggle_mic_mute(self, _command):
+        mic = self.audio_service.microphone if self.audio_service else None
+        if mic: mic.set_muted(not mic.muted)
+        else: self._spawn_cli(['wpctl', 'set-mute', '@DEFAULT_AUDIO_SOURCE@', 'toggle'])
+
+    def _cmd_brightness(self, command):
+        """Step brightness by delta percent of max_brightness via sysfs, else through brightnessctl."""
+        if not self.backlight_set_file: return
+        delta = int(command["delta"])
+        try:
+            max_val = int(self._read_sysfs(self.backlight_max_brightness_file))
+            # Step from the last requested level, like brightnessctl; actual_brightness can be rounded or lag behind
+            current = int(self._read_sysfs(self.backlight_set_file))
+            new_val = max(0, min(max_val, current + max_val * delta // 100))
+            with open(self.backlight_set_file, 'w') as f:
+                f.write(str(new_val))
+        except PermissionError:
+            # No udev rule granting write access; brightnessctl goes through logind instead
+            self._spawn_cli(['brightnessctl', 'set', f'{abs(delta)}%{"+" if delta > 0 else "-"}'])
+
+    _COMMANDS = {
+        "volume": _cmd_volume,
+        "toggle_mute": _cmd_toggle_mute,
+        "toggle_mic_mute": _cmd_toggle_mic_mute,
+        "brightness": _cmd_brightness,
+    }
 
     def accept_clients(self):
-        while self.running:
+        """Accept every pending connection; the listening socket is nonblocking."""
+        while True:
             try:
-                self.server_socket.settimeout(1.0); client_socket, _ = self.server_socket.accept()
-                with self.data_lock: self.clients.append(client_socket)
-                threading.Thread(target=self.handle_client, args=(client_socket,), daemon=True).start()
-            except socket.timeout: continue
+                client_socket, _ = self.server_socket.accept()
+            except BlockingIOError:
+                return
             except Exception as e:
                 if self.running: logger.error(f"Error accepting client: {e}")
+                return
+            # Abstract sockets have no file permissions: only serve our own user
+            _pid, uid, _gid = PEERCRED_STRUCT.unpack(client_socket.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, PEERCRED_STRUCT.size))
+            if uid != os.getuid():
+                logger.warning(f"Rejecting client from uid {uid}")
+                client_socket.close(); continue
+            client_socket.setblocking(False)
+            fd = client_socket.fileno()
+            self.clients[fd] = client_socket
+            self._epoll.register(fd, CLIENT_EPOLL_MASK)
+            # Greeting is the cached snapshot, sent straight from the bytes object. A memfd +
+            # sendfile() copy would cost a pwrite per state change to save one small copy per accept.
+            if not self._send_to(fd, client_socket, self._snapshot_bytes):
+                self._drop_client(fd)
 
     def run(self):
         if not self.running: self.cleanup(); return
-        inotify_thread = threading.Thread(target=self.inotify_event_loop, daemon=True); inotify_thread.start()
-        accept_thread = threading.Thread(target=self.accept_clients, daemon=True); accept_thread.start()
+        # The reactor runs on the calling thread and sleeps in epoll until there
+        # is work; signal handlers end it through stop()
         try:
-            while self.running: time.sleep(0.5)
+            self.event_loop()
         finally:
-            self.running = False; self.cleanup()
-            if self.glib_thread: self.glib_thread.join(timeout=1.0)
-            inotify_thread.join(timeout=1.0); accept_thread.join(timeout=1.0)
+            self.running = False
+            self.cleanup()
 
     def cleanup(self):
         logger.info("Cleaning up resources...")
         if self.main_loop and self.main_loop.is_running(): self.main_loop.quit()
         if self.audio_service: self.audio_service.cleanup()
+        if self._epoll: self._epoll.close()
+        try: os.close(self._wake_efd)
+        except OSError: pass
+        if self._time_fd != -1:
+            try: os.close(self._time_fd)
+            except OSError: pass
+        self._close_sysfs_fds()
         if self.inotify_fd != -1:
             try: os.close(self.inotify_fd)
             except OSError: pass
-        with self.data_lock:
-            for client in list(self.clients):
-                try: client.close()
-                except: pass
-            self.clients.clear()
+        for client in self.clients.values():
+            try: client.close()
+            except: pass
+        self.clients.clear()
         try: self.server_socket.close()
         except: pass
-        if os.path.exists(self.socket_path):
-            try: os.unlink(self.socket_path)
-            except OSError: pass
         logger.info("Service has shut down.")
 
 def main():
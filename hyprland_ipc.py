@@ -0,0 +1,26 @@
+import os
+import stat
+import logging
+
+logger = logging.getLogger(__name__)
+
+def resolve_hyprland_socket_dir():
+    """Hyprland's per-instance socket directory, probed once; None when it cannot be found."""
+    instance_signature = os.environ.get('HYPRLAND_INSTANCE_SIGNATURE')
+    if not instance_signature:
+        return None
+    potential_dirs = []
+    xdg_runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if xdg_runtime_dir:
+        potential_dirs.append(os.path.join(xdg_runtime_dir, "hypr", instance_signature))
+    potential_dirs.append(os.path.join("/tmp/hypr", instance_signature))
+
+    for socket_dir in potential_dirs:
+        try:
+            if stat.S_ISSOCK(os.stat(os.path.join(socket_dir, ".socket.sock")).st_mode):
+                return socket_dir
+        except OSError:
+            pass
+        logger.debug(f"Socket not found or not a socket file in {socket_dir}. Trying next path.")
+    logger.warning("Hyprland IPC socket not found in any of the potential paths.")
+    return None
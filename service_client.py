@@ -0,0 +1,181 @@
+import gi
+gi.require_version('GLib', '2.0')
+from gi.repository import GLib
+import os
+import socket
+import json
+try:
+    import orjson as _json # Faster parser, accepts bytes directly
+except ImportError:
+    _json = json
+import logging
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# stdout/stderr of one-shot commands go to /dev/null; built once, reused by every spawn
+_SPAWN_FILE_ACTIONS = [
+    (os.POSIX_SPAWN_OPEN, 1, os.devnull, os.O_WRONLY, 0),
+    (os.POSIX_SPAWN_OPEN, 2, os.devnull, os.O_WRONLY, 0),
+]
+
+def spawn_command(argv):
+    """
+    Start a one-shot command (hyprctl, hyprlock, ...) without forking the GTK
+    process. posix_spawnp skips Popen's fork and close_fds sweep; our fds are
+    close-on-exec already. The child is reaped from the main loop.
+    """
+    try:
+        pid = os.posix_spawnp(argv[0], argv, os.environ, file_actions=_SPAWN_FILE_ACTIONS)
+    except OSError as e:
+        logger.error(f"Failed to run {argv[0]}: {e}")
+        return False
+    GLib.child_watch_add(GLib.PRIORITY_DEFAULT_IDLE, pid, lambda *_: None)
+    return True
+
+class ServiceClient:
+    """
+    Process-wide connection to combined_service. Owns a single nonblocking
+    socket watched by the GLib main loop, and fans every decoded update out
+    to all subscribers on the GTK main thread.
+    """
+    _instance = None
+    RECV_BUFFER_SIZE = 65536
+    SOCKET_RCVBUF = 262144
+    FLUSH_INTERVAL_MS = 80 # Coalesce bursts of updates into one redraw
+    RETRY_DELAY_MIN_MS = 100
+    RETRY_DELAY_MAX_MS = 5000
+
+    def __init__(self):
+        self.socket_path = "\0combined_service" # Abstract namespace, see combined_service
+        self.service_socket = None
+        self.subscribers = []
+        self.last_data = None
+        self._watch_id = None
+        self._retry_id = None
+        self._retry_delay_ms = self.RETRY_DELAY_MIN_MS
+        self._buf = bytearray(self.RECV_BUFFER_SIZE)
+        self._view = memoryview(self._buf)
+        self._pending_data = None
+        self._flush_scheduled = False
+
+    @classmethod
+    def get(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def subscribe(self, callback):
+        """Register callback(data) and connect on first use. Must be called from the main thread."""
+        self.subscribers.append(callback)
+        if self.last_data is not None:
+            GLib.idle_add(self._deliver_to, callback, self.last_data)
+        if not self.service_socket and self._retry_id is None:
+            self.connect_to_service()
+
+    def connect_to_service(self):
+        sock = None
+        try:
+            # Nonblocking and close-on-exec set at creation, no extra fcntl calls
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET | socket.SOCK_CLOEXEC | socket.SOCK_NONBLOCK)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.SOCKET_RCVBUF)
+            sock.connect(self.socket_path)
+        except Exception:
+            if sock:
+                sock.close()
+            if self._retry_delay_ms == self.RETRY_DELAY_MIN_MS:
+                logger.warning("Failed to connect to combined_service. Retrying with backoff.")
+                self.start_service() # Try to start it once per outage
+            # Exponential backoff: 100 ms, 200 ms, ... up to 5 s
+            self._retry_id = GLib.timeout_add(self._retry_delay_ms, self.retry_connection)
+            self._retry_delay_ms = min(self._retry_delay_ms * 2, self.RETRY_DELAY_MAX_MS)
+            return
+        self._retry_delay_ms = self.RETRY_DELAY_MIN_MS
+        self.service_socket = sock
+        self._watch_id = GLib.unix_fd_add_full(
+            GLib.PRIORITY_DEFAULT, sock.fileno(),
+            GLib.IOCondition.IN | GLib.IOCondition.HUP | GLib.IOCondition.ERR,
+            self._on_readable)
+        logger.info("Connected to combined_service")
+
+    def send_command(self, command):
+        """Send a command dict to combined_service; False if it could not be delivered."""
+        if not self.service_socket:
+            return False
+        try:
+            self.service_socket.send(json.dumps(command).encode(), socket.MSG_DONTWAIT)
+            return True
+        except OSError as e:
+            logger.debug(f"Could not send {command}: {e}")
+            return False
+
+    def start_service(self):
+        # Assumes combined_service.py is in the same directory
+        script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "combined_service.py")
+        if os.path.exists(script_path):
+            try:
+                # Ensure the service script is executable or called via python
+                # Fully detached: no stdio or session shared with the bar
+                subprocess.Popen(['python3', script_path], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.DEVNULL, bufsize=-1, start_new_session=True, close_fds=True)
+                logger.info(f"Attempted to start {script_path}")
+            except Exception as e:
+                logger.error(f"Failed to start service: {e}")
+
+    def retry_connection(self):
+        self._retry_id = None
+        if not self.service_socket:
+            self.connect_to_service()
+        return False # Do not repeat timer
+
+    def _disconnect(self):
+        self._watch_id = None
+        if self.service_socket:
+            self.service_socket.close()
+            self.service_socket = None
+
+    def _on_readable(self, fd, condition):
+        """Main-loop callback: drain the socket, one SEQPACKET message per recv"""
+        view = self._view
+        try:
+            while True:
+                n = self.service_socket.recv_into(view, 0, socket.MSG_DONTWAIT)
+                if not n:
+                    raise ConnectionResetError("service closed the connection")
+                # Parse once, then fan out to subscribers
+                self._queue_update(_json.loads(bytes(view[:n])))
+        except BlockingIOError:
+            return GLib.SOURCE_CONTINUE # Drained; wait for more data
+        except (socket.error, json.JSONDecodeError) as e:
+            logger.warning(f"Service connection lost: {e}")
+        # Reconnect straight away; connect_to_service falls back to the backoff timer
+        self._disconnect()
+        self.connect_to_service()
+        return GLib.SOURCE_REMOVE
+
+    def _queue_update(self, data):
+        # Every frame is a full snapshot, so only the latest one needs drawing
+        self._pending_data = data
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            GLib.timeout_add(self.FLUSH_INTERVAL_MS, self._flush)
+
+    def _flush(self):
+        data, self._pending_data = self._pending_data, None
+        self._flush_scheduled = False
+        if data is not None:
+            self._dispatch(data)
+        return GLib.SOURCE_REMOVE
+
+    def _dispatch(self, data):
+        self.last_data = data
+        for callback in list(self.subscribers):
+            try:
+                callback(data)
+            except Exception as e:
+                logger.error(f"Service subscriber {callback} failed: {e}", exc_info=True)
+        return GLib.SOURCE_REMOVE
+
+    def _deliver_to(self, callback, data):
+        callback(data)
+        return GLib.SOURCE_REMOVE
@@ -2,12 +2,8 @@
 import gi
 gi.require_version('Gtk', '4.0')
 from gi.repository import Gtk, GLib
-import os
-import socket
-import json
-import threading
 import logging
-import subprocess
+from service_client import ServiceClient, spawn_command
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,6 +12,8 @@ class SystemStatsIsland(Gtk.Box):
     
     # --- CONFIGURATION (ULTRA-SIMPLE) ---
     ICON_FONT_FAMILY = "Symbols Nerd Font"
+    SCROLL_STEP = 5 # Percent per scroll event
+    SCROLL_FLUSH_MS = 16 # Sum a burst of scroll events into one command per frame
 
     BACKLIGHT_ICONS = ["󰃞 ", "󰃟 ", "󰃠 "]  # Low, Medium, High
     # ADDED: Icons for volume state
@@ -60,97 +58,76 @@ class SystemStatsIsland(Gtk.Box):
         mic_click.connect("pressed", self._on_mic_click)
         self.mic_label.add_controller(mic_click)
         
+        # --- Markup templates, built once; only the percentage is filled in per update ---
+        icon_tmpl = f'<span font_family="{self.ICON_FONT_FAMILY}">%s</span> %%d%%%%'
+        self._backlight_tmpl = [icon_tmpl % icon for icon in self.BACKLIGHT_ICONS]
+        self._volume_tmpl = {key: icon_tmpl % icon for key, icon in self.VOLUME_ICONS.items()}
+        self._mic_markup = {}
+        for muted, key, text, color in ((True, "muted", "Muted", "#f38ba8"), (False, "on", "On", "#a6e3a1")):
+            self._mic_markup[muted] = (f'<span font_family="{self.ICON_FONT_FAMILY}" color="{color}">{self.MIC_ICONS[key]}</span>'
+                                       f'<span color="{color}"> {text}</span>')
+        # Accumulated scroll deltas, flushed by a one-shot timeout
+        self._scroll_delta = {"volume": 0, "brightness": 0}
+        self._scroll_flush_id = {"volume": None, "brightness": None}
+
+        # Last state drawn per label; identical updates skip set_markup entirely
+        self._last_backlight = self._last_volume = self._last_mic = None
+
         # --- Service Connection ---
-        self.socket_path = "/tmp/combined_service.sock"
-        self.service_socket = None
-        self.connect_to_service()
+        ServiceClient.get().subscribe(self.update_display)
     
     # --- Event Handlers (One-shot commands) ---
-    def _on_backlight_click(self, *args): subprocess.Popen(['hyprlock'])
-    def _on_backlight_scroll(self, _, dx, dy): subprocess.run(['brightnessctl', 'set', '5%+' if dy < 0 else '5%-'])
-    def _on_volume_scroll(self, _, dx, dy): subprocess.run(['pamixer', '-i' if dy < 0 else '-d', '5'])
-    # CHANGED: Click now toggles mute, providing a standard function with visual feedback.
-    def _on_volume_click(self, *args): subprocess.run(['pamixer', '--toggle-mute'])
-    def _on_mic_click(self, *args): subprocess.run(['wpctl', 'set-mute', '@DEFAULT_AUDIO_SOURCE@', 'toggle'])
+    # Audio and backlight commands go to combined_service, which applies them
+    # natively; the CLI tools are only spawned while it is unreachable.
+    def _send_or_spawn(self, command, fallback_argv):
+        if not ServiceClient.get().send_command(command):
+            spawn_command(fallback_argv)
 
-    # --- Service Connection and Data Handling ---
-    def connect_to_service(self):
-        def connect():
-            try:
-                self.service_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-                self.service_socket.connect(self.socket_path)
-                threading.Thread(target=self.listen_for_updates, daemon=True).start()
-                logger.info("Connected to combined_service")
-            except Exception:
-                logger.warning("Failed to connect to combined_service. Retrying in 5s.")
-                self.start_service() # Try to start it if connection fails
-                GLib.timeout_add_seconds(5, self.retry_connection)
-        threading.Thread(target=connect, daemon=True).start()
+    def _on_backlight_click(self, *args): spawn_command(['hyprlock'])
+    def _on_backlight_scroll(self, _, dx, dy): self._queue_scroll("brightness", dy)
+    def _on_volume_scroll(self, _, dx, dy): self._queue_scroll("volume", dy)
 
-    def start_service(self):
-        # Assumes combined_service.py is in the same directory
-        script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "combined_service.py")
-        if os.path.exists(script_path):
-            try:
-                # Ensure the service script is executable or called via python
-                subprocess.Popen(['python3', script_path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                logger.info(f"Attempted to start {script_path}")
-            except Exception as e:
-                logger.error(f"Failed to start service: {e}")
+    def _queue_scroll(self, cmd, dy):
+        self._scroll_delta[cmd] += self.SCROLL_STEP if dy < 0 else -self.SCROLL_STEP
+        if self._scroll_flush_id[cmd] is None:
+            self._scroll_flush_id[cmd] = GLib.timeout_add(self.SCROLL_FLUSH_MS, self._flush_scroll, cmd)
 
-    def retry_connection(self):
-        if not self.service_socket:
-            self.connect_to_service()
-        return False # Do not repeat timer
+    def _flush_scroll(self, cmd):
+        delta, self._scroll_delta[cmd] = self._scroll_delta[cmd], 0
+        self._scroll_flush_id[cmd] = None
+        if delta:
+            step = str(abs(delta))
+            if cmd == "volume":
+                fallback = ['pamixer', '-i' if delta > 0 else '-d', step]
+            else:
+                fallback = ['brightnessctl', 'set', f'{step}%{"+" if delta > 0 else "-"}']
+            self._send_or_spawn({"cmd": cmd, "delta": delta}, fallback)
+        return GLib.SOURCE_REMOVE
+    # CHANGED: Click now toggles mute, providing a standard function with visual feedback.
+    def _on_volume_click(self, *args): self._send_or_spawn({"cmd": "toggle_mute"}, ['pamixer', '--toggle-mute'])
+    def _on_mic_click(self, *args):
+        self._send_or_spawn({"cmd": "toggle_mic_mute"}, ['wpctl', 'set-mute', '@DEFAULT_AUDIO_SOURCE@', 'toggle'])
 
-    def listen_for_updates(self):
-        try:
-            buffer = ""
-            while True:
-                data = self.service_socket.recv(1024).decode('utf-8')
-                if not data: break # Connection closed
-                buffer += data
-                while '\n' in buffer:
-                    line, buffer = buffer.split('\n', 1)
-                    if line.strip():
-                        service_data = json.loads(line)
-                        GLib.idle_add(self.update_display, service_data)
-        except (socket.error, json.JSONDecodeError, BrokenPipeError):
-            logger.warning("Service connection lost.")
-        finally:
-            self.service_socket = None
-            GLib.idle_add(self.retry_connection)
-    
+    # --- Data Handling ---
     def update_display(self, data):
         # Update Backlight
-        if (p := data.get("backlight_percentage")) is not None:
-            icon = self.BACKLIGHT_ICONS[0] if p <= 33 else self.BACKLIGHT_ICONS[1] if p <= 66 else self.BACKLIGHT_ICONS[2]
-            markup = f'<span font_family="{self.ICON_FONT_FAMILY}">{icon}</span> {p}%'
-            self.backlight_label.set_markup(markup)
+        if (p := data.get("backlight_percentage")) is not None and p != self._last_backlight:
+            self._last_backlight = p
+            bucket = 0 if p <= 33 else 1 if p <= 66 else 2
+            self.backlight_label.set_markup(self._backlight_tmpl[bucket] % p)
 
-        # ADDED: Update Volume icon and percentage
+        # Update Volume icon and percentage
         if (vol := data.get("volume_percentage")) is not None:
             is_muted = data.get("speaker_muted", False)
-            if is_muted or vol == 0:
-                icon = self.VOLUME_ICONS["muted"]
-            elif vol <= 33:
-                icon = self.VOLUME_ICONS["low"]
-            elif vol <= 66:
-                icon = self.VOLUME_ICONS["medium"]
-            else:
-                icon = self.VOLUME_ICONS["high"]
-            
-            markup = f'<span font_family="{self.ICON_FONT_FAMILY}">{icon}</span> {vol}%'
-            self.volume_label.set_markup(markup)
+            key = "muted" if is_muted or vol == 0 else "low" if vol <= 33 else "medium" if vol <= 66 else "high"
+            state = (key, vol)
+            if state != self._last_volume:
+                self._last_volume = state
+                self.volume_label.set_markup(self._volume_tmpl[key] % vol)
 
         # Update Mic Status
-        if (muted := data.get("mic_muted")) is not None:
-            if muted:
-                icon, text, color = self.MIC_ICONS["muted"], "Muted", "#f38ba8"
-            else:
-                icon, text, color = self.MIC_ICONS["on"], "On", "#a6e3a1"
-            markup = (f'<span font_family="{self.ICON_FONT_FAMILY}" color="{color}">{icon}</span>'
-                      f'<span color="{color}"> {text}</span>')
-            self.mic_label.set_markup(markup)
+        if (muted := data.get("mic_muted")) is not None and muted != self._last_mic:
+            self._last_mic = muted
+            self.mic_label.set_markup(self._mic_markup[bool(muted)])
         
         return GLib.SOURCE_REMOVE
\ No newline at end of file
@@ -3,6 +3,9 @@ gi.require_version('Gtk', '4.0')
 gi.require_version('AstalTray', '0.1')
 gi.require_version('Gio', '2.0')
 from gi.repository import Gtk, Gdk, GLib, Gio, GObject, AstalTray
+import logging
+
+logger = logging.getLogger(__name__)
 
 class SystrayIsland(Gtk.Box):
     """
@@ -24,7 +27,7 @@ class SystrayIsland(Gtk.Box):
             self.tray.connect("item-removed", self._on_item_removed)
                 
         except GLib.Error as e:
-            print(f"Warning: Could not initialize AstalTray. {e}")
+            logger.warning("Could not initialize AstalTray. %s", e)
             error_label = Gtk.Label(label="Systray not available")
             self.append(error_label)
 
@@ -39,6 +42,8 @@ class SystrayIsland(Gtk.Box):
     def _on_item_removed(self, tray, object_path):
         if object_path in self.item_widgets:
             widget_to_remove = self.item_widgets.pop(object_path)
+            if widget_to_remove.popover:
+                widget_to_remove.popover.unparent() # GTK4 popovers must be unparented explicitly
             self.remove(widget_to_remove)
 
     def _create_widget_for_item(self, item, object_path):
@@ -67,14 +72,26 @@ class SystrayIsland(Gtk.Box):
                 clean_object_path = '/' + parts[1]
         button.dbus_service_name = service_name
         button.dbus_clean_object_path = clean_object_path
+
+        # SNI proxy for the ContextMenu fallback, built once and asynchronously.
+        # No property load or signal subscription: we only ever call methods on it.
+        button.sni_proxy = None
+        if service_name and clean_object_path:
+            Gio.DBusProxy.new_for_bus(
+                Gio.BusType.SESSION,
+                Gio.DBusProxyFlags.DO_NOT_LOAD_PROPERTIES | Gio.DBusProxyFlags.DO_NOT_CONNECT_SIGNALS,
+                None, service_name, clean_object_path, 'org.kde.StatusNotifierItem',
+                None, self._on_proxy_ready, button)
         
-        button.menu_model = item.get_property("menu-model")
+        # One PopoverMenu per button, created with the first menu model and reused
+        button.popover = None
+        self._set_menu_model(button, item.get_property("menu-model"))
         action_group = item.get_action_group()
         if action_group:
             button.insert_action_group("dbusmenu", action_group)
             
         def on_menu_model_changed(*args):
-            button.menu_model = item.get_property("menu-model")
+            self._set_menu_model(button, item.get_property("menu-model"))
         item.connect("notify::menu-model", on_menu_model_changed)
 
         def on_action_group_changed(*args):
@@ -92,63 +109,70 @@ class SystrayIsland(Gtk.Box):
         
         return button
 
+    def _set_menu_model(self, button, model):
+        button.menu_model = model
+        if button.popover:
+            button.popover.set_menu_model(model)
+        elif model:
+            button.popover = Gtk.PopoverMenu.new_from_model(model)
+            button.popover.set_parent(button)
+
+    def _on_proxy_ready(self, _source, result, button):
+        try:
+            button.sni_proxy = Gio.DBusProxy.new_for_bus_finish(result)
+        except GLib.Error as e:
+            logger.warning("Failed to create D-Bus proxy for standard context menu: %s", e)
+
     def _on_left_click(self, button):
-        print(f"Left-click on {button.dbus_service_name}{button.dbus_clean_object_path}")
+        logger.debug("Left-click on %s%s", button.dbus_service_name, button.dbus_clean_object_path)
         button.tray_item.activate(0, 0)
 
     def _on_right_click(self, gesture, n_press, x, y):
         button = gesture.get_widget()
-        print(f"Right-click on {button.dbus_service_name}{button.dbus_clean_object_path}")
+        logger.debug("Right-click on %s%s", button.dbus_service_name, button.dbus_clean_object_path)
 
         if button.menu_model:
-            print("Found menu-model. Creating Gtk.PopoverMenu.")
-            popover = Gtk.PopoverMenu.new_from_model(button.menu_model)
-            popover.set_parent(button)
-            popover.popup()
+            logger.debug("Found menu-model. Showing Gtk.PopoverMenu.")
+            button.popover.popup()
             return
 
-        print("No menu-model found. Falling back to standard SNI ContextMenu method.")
+        logger.debug("No menu-model found. Falling back to standard SNI ContextMenu method.")
         self._try_standard_context_menu(button, x, y)
         
     def _try_standard_context_menu(self, button, x, y):
-        service_name = button.dbus_service_name
-        object_path = button.dbus_clean_object_path
-        if not service_name or not object_path:
+        """
+        Ask the item for its own menu via ContextMenu, then SecondaryActivate.
+        Both calls are async, so an item that never answers cannot stall the bar.
+        """
+        proxy = button.sni_proxy
+        if not proxy:
             return
 
         try:
-            proxy = Gio.DBusProxy.new_for_bus_sync(
-                bus_type=Gio.BusType.SESSION,
-                flags=Gio.DBusProxyFlags.NONE,
-                info=None,
-                name=service_name,
-                object_path=object_path,
-                interface_name='org.kde.StatusNotifierItem',
-                cancellable=None)
-
-            try:
-                surface = button.get_native().get_surface()
-                origin_x, origin_y = surface.get_surface_transform().transform_point(0, 0)
-                final_x, final_y = int(origin_x + x), int(origin_y + y)
-            except:
-                final_x, final_y = int(x), int(y)
-
-            try:
-                print(f"Trying ContextMenu with coords ({final_x}, {final_y})")
-                proxy.call_sync('ContextMenu', GLib.Variant('(ii)', (final_x, final_y)),
-                                Gio.DBusCallFlags.NONE, 500, None)
-                print("ContextMenu call succeeded.")
-                return
-            except GLib.Error as e:
-                print(f"ContextMenu failed: {e}. Trying SecondaryActivate...")
-
-            try:
-                proxy.call_sync('SecondaryActivate', GLib.Variant('(ii)', (final_x, final_y)),
-                                Gio.DBusCallFlags.NONE, 500, None)
-                print("SecondaryActivate call succeeded.")
-                return
-            except GLib.Error as e:
-                print(f"SecondaryActivate also failed: {e}")
-
-        except Exception as e:
-            print(f"Failed to create D-Bus proxy for standard context menu: {e}")
\ No newline at end of file
+            surface = button.get_native().get_surface()
+            origin_x, origin_y = surface.get_surface_transform().transform_point(0, 0)
+            final_x, final_y = int(origin_x + x), int(origin_y + y)
+        except Exception:
+            final_x, final_y = int(x), int(y)
+
+        logger.debug("Trying ContextMenu with coords (%d, %d)", final_x, final_y)
+        coords = GLib.Variant('(ii)', (final_x, final_y))
+        proxy.call('ContextMenu', coords, Gio.DBusCallFlags.NONE, 500, None,
+                   self._on_context_menu_done, coords)
+
+    def _on_context_menu_done(self, proxy, result, coords):
+        try:
+            proxy.call_finish(result)
+            logger.debug("ContextMenu call succeeded.")
+            return
+        except GLib.Error as e:
+            logger.debug("ContextMenu failed: %s. Trying SecondaryActivate...", e)
+        proxy.call('SecondaryActivate', coords, Gio.DBusCallFlags.NONE, 500, None,
+                   self._on_secondary_activate_done, None)
+
+    def _on_secondary_activate_done(self, proxy, result, _user_data):
+        try:
+            proxy.call_finish(result)
+            logger.debug("SecondaryActivate call succeeded.")
+        except GLib.Error as e:
+            logger.warning("SecondaryActivate also failed: %s", e)
\ No newline at end of file
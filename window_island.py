@@ -1,15 +1,26 @@
 import gi
 gi.require_version('Gtk', '4.0')
-from gi.repository import Gtk, GLib
+from gi.repository import Gtk, GLib, Pango
 import socket
 import json
-import threading
+try:
+    import orjson as _json # Faster parser, accepts bytes directly
+except ImportError:
+    _json = json
+import struct
 import logging
+import os
+import subprocess
 
 # Set up logging
 logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger(__name__)
 
+FRAME_HEADER = struct.Struct('<I') # Payload length prefix, see window_service.frame_message
+RECV_BUFFER_SIZE = 65536
+# window_service.py sits next to this file; it is run through python3, so it needs no exec bit
+SERVICE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "window_service.py")
+
 class WindowIsland(Gtk.Box):
     def __init__(self, workspace_island_ref=None):  # Add workspace_island_ref parameter
         super().__init__(orientation=Gtk.Orientation.HORIZONTAL)
@@ -18,7 +29,13 @@ class WindowIsland(Gtk.Box):
         
         # Create window title label
         self.window_label = Gtk.Label()
-        self.window_label.set_markup('<span font="10" weight="normal">Connecting...</span>')
+        # Size and weight are fixed, so they are set once as attributes; titles
+        # are then plain text, with no markup to parse (or escape)
+        title_attrs = Pango.AttrList()
+        title_attrs.insert(Pango.attr_size_new(10 * Pango.SCALE))
+        title_attrs.insert(Pango.attr_weight_new(Pango.Weight.NORMAL))
+        self.window_label.set_attributes(title_attrs)
+        self.window_label.set_text("Connecting...")
         self.window_label.add_css_class("window-label")
         self.window_label.set_ellipsize(3)  # Ellipsize at end
         
@@ -31,48 +48,43 @@ class WindowIsland(Gtk.Box):
         self.current_workspaces_data = []  # Added to store workspace data
         self.current_active_workspace_id = None  # Added to store active workspace ID
         self.workspace_island_ref = workspace_island_ref  # Store the reference
+        # Receive buffer shared by every connection; frames are parsed in place
+        self._buf = bytearray(RECV_BUFFER_SIZE)
+        self._view = memoryview(self._buf)
+        self._write_off = 0
         
         # Start service connection
         self.connect_to_service()
     
     def connect_to_service(self):
-        """Connect to the window service"""
-        def connect():
-            try:
-                self.service_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-                self.service_socket.connect(self.socket_path)
-                
-                # Start listening for updates in a separate thread
-                listen_thread = threading.Thread(target=self.listen_for_updates, daemon=True)
-                listen_thread.start()
-                
-                logger.info("Connected to window service")
-                
-            except Exception as e:
-                logger.warning(f"Failed to connect to window service: {e}")
-                self.service_socket = None
-                # Try to start the service
-                self.start_service()
-        
-        # Run connection in thread to avoid blocking UI
-        connect_thread = threading.Thread(target=connect, daemon=True)
-        connect_thread.start()
+        """Connect to the window service; updates are then read by the GTK main loop"""
+        sock = None
+        try:
+            # Connecting to a local socket never blocks, so this can run on the main thread
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM | socket.SOCK_CLOEXEC)
+            sock.connect(self.socket_path)
+            sock.setblocking(False)
+        except Exception as e:
+            logger.warning(f"Failed to connect to window service: {e}")
+            if sock:
+                sock.close()
+            self.service_socket = None
+            # Try to start the service
+            self.start_service()
+            return
+        self.service_socket = sock
+        self._write_off = 0
+        GLib.unix_fd_add_full(
+            GLib.PRIORITY_DEFAULT, sock.fileno(),
+            GLib.IOCondition.IN | GLib.IOCondition.HUP | GLib.IOCondition.ERR,
+            self._on_readable)
+        logger.info("Connected to window service")
     
     def start_service(self):
         """Try to start the window service"""
         try:
-            import subprocess
-            import os
-            
-            # Get the directory where window_island.py is located
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            service_path = os.path.join(script_dir, "window_service.py")
-            
-            # Make sure the service file is executable
-            os.chmod(service_path, 0o755)
-            
             subprocess.Popen([
-                'python3', service_path
+                'python3', SERVICE_PATH
             ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             
             # Wait a bit and try to connect again
@@ -87,38 +99,51 @@ class WindowIsland(Gtk.Box):
             self.connect_to_service()
         return False  # Don't repeat this timeout
     
-    def listen_for_updates(self):
-        """Listen for window updates from the service"""
-        if not self.service_socket:
-            return
-            
+    def _on_readable(self, fd, condition):
+        """Main-loop callback: read what is available and handle every complete frame"""
+        buf, view = self._buf, self._view
+        header_size = FRAME_HEADER.size
         try:
-            buffer = ""
             while True:
-                data = self.service_socket.recv(1024).decode()  # Consider larger buffer if needed
-                if not data:
+                n = self.service_socket.recv_into(view[self._write_off:])
+                if not n:
                     logger.warning("Window/Workspace service disconnected (no data).")
                     break
-                    
-                buffer += data
-                while '\n' in buffer:
-                    line, buffer = buffer.split('\n', 1)
-                    if line.strip():
-                        try:
-                            display_state_info = json.loads(line)
-                            # Update UI in main thread
-                            GLib.idle_add(self.update_display, display_state_info)
-                        except json.JSONDecodeError as e:
-                            logger.error(f"Failed to decode JSON from window/workspace service: {e} - Data: '{line}'")
+                self._write_off += n
+                write_off = self._write_off
+
+                # Peel off every complete frame
+                off = 0
+                while write_off - off >= header_size:
+                    (length,) = FRAME_HEADER.unpack_from(buf, off)
+                    if length > RECV_BUFFER_SIZE - header_size:
+                        raise ValueError(f"Oversized frame from window/workspace service: {length} bytes")
+                    end = off + header_size + length
+                    if end > write_off:
+                        break
+                    try:
+                        # Already on the main thread: update the UI directly
+                        self.update_display(_json.loads(bytes(view[off + header_size:end])))
+                    except json.JSONDecodeError as e:
+                        logger.error(f"Failed to decode JSON from window/workspace service: {e}")
+                    off = end
+                if off:
+                    # Move the partial tail frame to the front
+                    self._write_off = write_off - off
+                    buf[:self._write_off] = buf[off:write_off]
                             
+        except BlockingIOError:
+            return GLib.SOURCE_CONTINUE # Drained; wait for more data
         except socket.error as e:
             logger.warning(f"Window/Workspace service connection lost: {e}")
         except Exception as e:
             logger.error(f"Error listening to window/workspace service: {e}")
-        finally:
-            self.service_socket = None
-            # Try to reconnect after a delay
-            GLib.timeout_add_seconds(3, self.retry_connection)
+
+        self.service_socket.close()
+        self.service_socket = None
+        # Try to reconnect after a delay
+        GLib.timeout_add_seconds(3, self.retry_connection)
+        return GLib.SOURCE_REMOVE
     
     def update_display(self, display_state_info):
         """Update the window title and workspace display with info from service"""
@@ -131,7 +156,7 @@ class WindowIsland(Gtk.Box):
             title = title[:67] + "..."
         
         if self.current_title != title:
-            self.window_label.set_markup(f'<span font="10" weight="normal">{title}</span>')
+            self.window_label.set_text(title)
             self.current_title = title
 
         # Update workspaces
@@ -139,7 +164,5 @@ class WindowIsland(Gtk.Box):
         self.current_active_workspace_id = display_state_info.get("active_workspace_id")
 
         # If LayerTopBar is directly listening or WindowIsland has a direct reference to WorkspaceIsland:
-        if hasattr(self, 'workspace_island_ref') and self.workspace_island_ref:
-            self.workspace_island_ref.update_workspaces(self.current_workspaces_data, self.current_active_workspace_id)
-
-        return False  # Don't repeat this idle call
\ No newline at end of file
+        if self.workspace_island_ref is not None:
+            self.workspace_island_ref.update_workspaces(self.current_workspaces_data, self.current_active_workspace_id)
\ No newline at end of file
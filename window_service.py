@@ -8,16 +8,44 @@ import os
 import sys
 import time
 import json
+try:
+    from orjson import dumps as _json_dumps, loads as _json_loads # C codec, bytes in and out
+except ImportError:
+    def _json_dumps(obj): return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+    _json_loads = json.loads
 import socket
+import struct
+import selectors
 import threading
-from pathlib import Path
 import signal
 import logging
+from hyprland_ipc import resolve_hyprland_socket_dir
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Hyprland events (the name before ">>" on .socket2.sock) that can change what we publish
+DISPLAY_EVENTS = frozenset((
+    b'activewindow', b'activewindowv2', b'windowtitle', b'windowtitlev2',
+    b'workspace', b'workspacev2', b'focusedmon', b'focusedmonv2',
+    b'createworkspace', b'createworkspacev2', b'destroyworkspace', b'destroyworkspacev2',
+    b'renameworkspace', b'moveworkspace', b'moveworkspacev2',
+    b'openwindow', b'closewindow', b'movewindow', b'movewindowv2',
+    b'monitoradded', b'monitoraddedv2', b'monitorremoved',
+))
+EVENT_READ_SIZE = 65536
+EVENT_DEBOUNCE_S = 0.015 # One user action (e.g. a workspace switch) fires several events
+# Hyprland separates the replies of a [[BATCH]] request with this
+HYPRLAND_BATCH_DELIMITER = b'\n\n\n'
+
+# Each message is a little-endian u32 payload length followed by the JSON state
+FRAME_HEADER = struct.Struct('<I')
+
+def frame_message(state):
+    payload = _json_dumps(state)
+    return FRAME_HEADER.pack(len(payload)) + payload
+
 try:
     # Try to import Wayland/X11 libraries
     HAS_SUBPROCESS = True  # This seems to be a misnomer, was not used for subprocess before.
@@ -33,8 +61,22 @@ class WindowService:
             "workspaces": [],
             "active_workspace_id": None
         }
-        self.clients = []
+        # Framed encoding of current_display_state_data, rebuilt only when the state
+        # changes. Readers on other threads just take the reference; bytes never mutate.
+        self._encoded_state = frame_message(self.current_display_state_data)
+        # Added by the accept thread, written to by the monitor thread. The lock keeps a
+        # greeting and a broadcast from interleaving their bytes on one socket.
+        self.clients: set[socket.socket] = set()
+        self._clients_lock = threading.Lock()
         self.running = True
+        # The environment never changes while we run, so it is read once here
+        self.is_hyprland = os.environ.get('HYPRLAND_INSTANCE_SIGNATURE') is not None
+        self.is_x11 = os.environ.get('DISPLAY') is not None
+        hypr_dir = resolve_hyprland_socket_dir()
+        self._hypr_socket_path = os.path.join(hypr_dir, ".socket.sock") if hypr_dir else None
+        self._hypr_event_socket_path = os.path.join(hypr_dir, ".socket2.sock") if hypr_dir else None
+        self._hypr_batch_supported = True # Cleared if this Hyprland does not delimit [[BATCH]] replies
+        self._event_socket = self._connect_event_socket()
         
         # Remove existing socket
         if os.path.exists(self.socket_path):
@@ -67,76 +109,97 @@ class WindowService:
         except Exception as e:
             logger.error(f"Error during cleanup: {e}")
     
-    def _fetch_hyprland_data(self, ipc_command):
-        """Helper function to send a command to Hyprland IPC and get JSON response."""
-        instance_signature = os.environ.get('HYPRLAND_INSTANCE_SIGNATURE')
-        if not instance_signature:
+    def _recv_until_eof(self, hypr_socket, ipc_command):
+        """Hyprland closes the connection after its reply, so EOF marks the end of it."""
+        chunks, total = [], 0
+        try:
+            while True:
+                chunk = hypr_socket.recv(8192)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                total += len(chunk)
+                if total > 131072:
+                    logger.error(f"Hyprland IPC response too large for command {ipc_command}.")
+                    return None
+        except socket.timeout:
+            logger.debug(f"Timeout receiving data from Hyprland IPC for {ipc_command}. Data so far: {total} bytes")
+        # One join instead of re-copying the response on every chunk
+        return b"".join(chunks)
+
+    def _hyprland_request(self, ipc_command):
+        """Helper function to send a command to Hyprland IPC and return the raw response bytes."""
+        # Hyprland serves one request per connection and then closes it, so the
+        # connection cannot be kept open; the path resolved in __init__ is what we keep
+        if self._hypr_socket_path is None:
             return None
 
-        potential_paths = []
-        xdg_runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
-        if xdg_runtime_dir:
-            potential_paths.append(
-                Path(xdg_runtime_dir) / "hypr" / instance_signature / ".socket.sock"
-            )
-        potential_paths.append(
-            Path("/tmp/hypr") / instance_signature / ".socket.sock"
-        )
+        hypr_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM | socket.SOCK_CLOEXEC)
+        try:
+            hypr_socket.connect(self._hypr_socket_path)
+            hypr_socket.sendall(ipc_command.encode('utf-8'))
+            hypr_socket.settimeout(0.5)
+            response_data = self._recv_until_eof(hypr_socket, ipc_command)
+        except (socket.error, FileNotFoundError) as e:
+            logger.error(f"Error with Hyprland IPC socket {self._hypr_socket_path} for {ipc_command}: {e}")
+            return None
+        finally:
+            hypr_socket.close()
 
-        for socket_path_obj in potential_paths:
-            socket_path_str = str(socket_path_obj)
-            if not socket_path_obj.exists() or not socket_path_obj.is_socket():
-                logger.debug(f"Socket not found or not a socket file at {socket_path_str}. Trying next path.")
-                continue
+        if not response_data:
+            if response_data is not None:
+                logger.warning(f"No data received from Hyprland IPC for {ipc_command} at {self._hypr_socket_path}")
+            return None
+        return response_data
 
-            hypr_socket = None
-            try:
-                hypr_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-                hypr_socket.connect(socket_path_str)
-                logger.debug(f"Successfully connected to Hyprland IPC socket: {socket_path_str} for command {ipc_command}")
-                
-                hypr_socket.sendall(ipc_command.encode('utf-8'))
-                
-                response_data = b""
-                hypr_socket.settimeout(0.5) 
-                try:
-                    while True:
-                        chunk = hypr_socket.recv(8192)
-                        if not chunk:
-                            break
-                        response_data += chunk
-                        if len(response_data) > 131072:
-                            logger.error(f"Hyprland IPC response too large for command {ipc_command}.")
-                            return None
-                except socket.timeout:
-                    logger.debug(f"Timeout receiving data from Hyprland IPC socket: {socket_path_str} for {ipc_command}. Data so far: {len(response_data)} bytes")
-                
-                if response_data:
-                    try:
-                        decoded_data = response_data.decode('utf-8')
-                        return json.loads(decoded_data)
-                    except json.JSONDecodeError as e:
-                        logger.error(f"Failed to decode JSON from Hyprland IPC for {ipc_command}: {e}. Response: {response_data[:200]}")
-                        return None
-                else:
-                    logger.warning(f"No data received from Hyprland IPC for {ipc_command} at {socket_path_str}")
-                    return None
-                
-            except (socket.error, FileNotFoundError) as e:
-                logger.error(f"Error with Hyprland IPC socket {socket_path_str} for {ipc_command}: {e}")
-            finally:
-                if hypr_socket:
-                    try:
-                        hypr_socket.close()
-                    except socket.error as e:
-                        logger.error(f"Error closing Hyprland IPC socket {socket_path_str}: {e}")
-            
-        logger.error(f"Failed to get Hyprland data for {ipc_command} after trying all potential IPC socket paths.")
-        return None
+    def _decode_hyprland_json(self, ipc_command, response_data):
+        try:
+            return _json_loads(response_data) # Raw bytes; no intermediate str
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            logger.error(f"Failed to decode JSON from Hyprland IPC for {ipc_command}: {e}. Response: {response_data[:200]}")
+            return None
+
+    def _fetch_hyprland_data(self, ipc_command):
+        """Helper function to send a command to Hyprland IPC and get JSON response."""
+        response_data = self._hyprland_request(ipc_command)
+        return self._decode_hyprland_json(ipc_command, response_data) if response_data else None
+
+    def _fetch_hyprland_batch(self, ipc_commands):
+        """Run several JSON commands in one IPC round trip; one decoded result (or None) per command."""
+        if not self._hypr_batch_supported:
+            return [self._fetch_hyprland_data(cmd) for cmd in ipc_commands]
+        response_data = self._hyprland_request("[[BATCH]]" + ";".join(ipc_commands))
+        if not response_data:
+            return [None] * len(ipc_commands)
+        replies = response_data.split(HYPRLAND_BATCH_DELIMITER)
+        if len(replies) != len(ipc_commands):
+            # Older Hyprland joins batch replies without a delimiter; ask one command at a time from now on
+            logger.warning(f"Hyprland batch returned {len(replies)} replies for {len(ipc_commands)} commands, "
+                           "falling back to separate requests")
+            self._hypr_batch_supported = False
+            return [self._fetch_hyprland_data(cmd) for cmd in ipc_commands]
+        return [self._decode_hyprland_json(cmd, reply) for cmd, reply in zip(ipc_commands, replies)]
+
+    def _connect_event_socket(self):
+        """Connect to Hyprland's event socket; None if it is not reachable (we then poll)."""
+        socket_path_str = self._hypr_event_socket_path
+        if socket_path_str is None:
+            return None
+        event_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM | socket.SOCK_CLOEXEC)
+        try:
+            event_socket.connect(socket_path_str)
+        except (socket.error, FileNotFoundError) as e:
+            logger.warning(f"Hyprland event socket not reachable at {socket_path_str} ({e}), falling back to polling.")
+            event_socket.close()
+            return None
+        event_socket.setblocking(False)
+        logger.info(f"Listening for Hyprland events on {socket_path_str}")
+        return event_socket
 
-    def get_hyprland_active_window_props(self):
-        """Get active window properties from Hyprland."""
-        data = self._fetch_hyprland_data("j/activewindow")
+    def get_hyprland_active_window_props(self, data=None):
+        """Get active window properties from Hyprland (or from an already fetched j/activewindow reply)."""
+        if data is None:
+            data = self._fetch_hyprland_data("j/activewindow")
         if data and isinstance(data, dict):
             return {
                 "title": data.get("title", "Untitled"),
@@ -145,9 +208,10 @@ class WindowService:
             }
         return {"title": "Hyprland, ArchLinux", "class": "", "pid": 0}
 
-    def get_hyprland_all_workspaces_list(self):
+    def get_hyprland_all_workspaces_list(self, data=None):
         """Get list of all non-special workspaces from Hyprland, sorted by ID."""
-        data = self._fetch_hyprland_data("j/workspaces")
+        if data is None:
+            data = self._fetch_hyprland_data("j/workspaces")
         if data and isinstance(data, list):
             # Filter out special workspaces (ID < 0) and sort by ID
             filtered_workspaces = []
@@ -167,18 +231,22 @@ class WindowService:
             return filtered_workspaces
         return []
 
-    def get_hyprland_active_workspace_id_only(self):
+    def get_hyprland_active_workspace_id_only(self, data=None):
         """Get the ID of the active workspace from Hyprland."""
-        data = self._fetch_hyprland_data("j/activeworkspace")
+        if data is None:
+            data = self._fetch_hyprland_data("j/activeworkspace")
         if data and isinstance(data, dict):
             return data.get("id")
         return None
 
     def get_current_display_state_from_hyprland(self):
-        """Gets combined window and workspace info from Hyprland."""
-        active_window_props = self.get_hyprland_active_window_props()
-        all_workspaces_list = self.get_hyprland_all_workspaces_list()
-        active_ws_id = self.get_hyprland_active_workspace_id_only()
+        """Gets combined window and workspace info from Hyprland in a single IPC round trip."""
+        window_data, workspaces_data, active_ws_data = self._fetch_hyprland_batch(
+            ["j/activewindow", "j/workspaces", "j/activeworkspace"])
+        # An empty dict/list (not None) keeps the getters from fetching again
+        active_window_props = self.get_hyprland_active_window_props(window_data or {})
+        all_workspaces_list = self.get_hyprland_all_workspaces_list(workspaces_data or [])
+        active_ws_id = self.get_hyprland_active_workspace_id_only(active_ws_data or {})
         
         # Already sorted in get_hyprland_all_workspaces_list()
         return {
@@ -195,9 +263,9 @@ class WindowService:
     def get_current_display_state(self):
         """Get current display state (window and workspaces)."""
         try:
-            if self.check_hyprland():
+            if self.is_hyprland:
                 return self.get_current_display_state_from_hyprland()
-            elif self.check_x11():
+            elif self.is_x11:
                 x11_window_info = self.get_x11_window()
                 return {
                     "active_window": x11_window_info,
@@ -217,25 +285,77 @@ class WindowService:
                 "active_workspace_id": None
             }
 
-    def check_hyprland(self):
-        """Check if Hyprland is running by checking for its instance signature."""
-        return os.environ.get('HYPRLAND_INSTANCE_SIGNATURE') is not None
-    
-    def check_x11(self):
-        """Check if X11 is available"""
-        return os.environ.get('DISPLAY') is not None
+    def refresh_display_state(self):
+        """Fetch the current state and notify clients if it changed."""
+        new_state_data = self.get_current_display_state()
+        # The state is encoded anyway to be sent, and the dicts are always built in the
+        # same key order, so comparing the bytes (one memcmp) replaces a nested dict walk
+        encoded_state = frame_message(new_state_data)
+        
+        if encoded_state != self._encoded_state:
+            self.current_display_state_data = new_state_data
+            self._encoded_state = encoded_state
+            self.notify_clients()
+            logger.debug(f"Display state changed: Win: {new_state_data['active_window']['title']}, WS_ID: {new_state_data['active_workspace_id']}")
 
     def monitor_display_state(self):
-        """Monitor window and workspace changes."""
+        """Monitor window and workspace changes: event driven, polling only without the event socket."""
+        try:
+            self.refresh_display_state()
+        except Exception as e:
+            logger.error(f"Error in display state monitoring: {e}")
+        if self._event_socket is not None:
+            self._watch_hyprland_events()
+        self._poll_display_state()
+
+    def _watch_hyprland_events(self):
+        """Sleep on .socket2.sock and refresh once per burst of relevant events; returns if it closes."""
+        selector = selectors.DefaultSelector()
+        selector.register(self._event_socket, selectors.EVENT_READ)
+        pending = bytearray() # Partial event line carried over between reads
+        refresh_deadline = None # Set by the first relevant event of a burst
+        try:
+            while self.running:
+                # Bounded wait so a shutdown is noticed
+                timeout = 1.0 if refresh_deadline is None else max(0.0, refresh_deadline - time.monotonic())
+                ready = selector.select(timeout)
+                relevant = False
+                while ready:
+                    try:
+                        data = self._event_socket.recv(EVENT_READ_SIZE)
+                    except BlockingIOError:
+                        break
+                    if not data:
+                        logger.warning("Hyprland event socket closed, falling back to polling.")
+                        return
+                    pending += data
+                    # Every complete line is "EVENT>>DATA"; only the name matters here
+                    end = pending.rfind(b'\n')
+                    if end != -1:
+                        for line in bytes(pending[:end]).split(b'\n'):
+                            if line.partition(b'>>')[0] in DISPLAY_EVENTS:
+                                relevant = True
+                        del pending[:end + 1]
+                if relevant and refresh_deadline is None:
+                    refresh_deadline = time.monotonic() + EVENT_DEBOUNCE_S
+                # Everything that arrived within the debounce window costs a single refresh
+                if refresh_deadline is not None and time.monotonic() >= refresh_deadline:
+                    refresh_deadline = None
+                    try:
+                        self.refresh_display_state()
+                    except Exception as e:
+                        logger.error(f"Error in display state monitoring: {e}")
+        except OSError as e:
+            logger.error(f"Hyprland event socket error: {e}")
+        finally:
+            selector.close()
+            self._event_socket.close()
+            self._event_socket = None
+
+    def _poll_display_state(self):
         while self.running:
             try:
-                new_state_data = self.get_current_display_state()
-                
-                if new_state_data != self.current_display_state_data:
-                    self.current_display_state_data = new_state_data
-                    self.notify_clients()
-                    logger.debug(f"Display state changed: Win: {new_state_data['active_window']['title']}, WS_ID: {new_state_data['active_workspace_id']}")
-                
+                self.refresh_display_state()
                 time.sleep(0.1)
                 
             except Exception as e:
@@ -244,54 +364,34 @@ class WindowService:
     
     def notify_clients(self):
         """Notify all connected clients of display state changes."""
-        message = json.dumps(self.current_display_state_data) + "\n"
-        disconnected_clients = []
+        # One view over the shared bytes; sendall slices it without copying
+        message = memoryview(self._encoded_state)
         
-        for client in self.clients:
-            try:
-                client.send(message.encode())
-            except Exception:
-                disconnected_clients.append(client)
-        
-        for client in disconnected_clients:
-            self.clients.remove(client)
-            try:
-                client.close()
-            except Exception:
-                pass
-    
-    def handle_client(self, client_socket):
-        """Handle a client connection."""
-        try:
-            message = json.dumps(self.current_display_state_data) + "\n"
-            client_socket.send(message.encode())
-            
-            while self.running:
-                time.sleep(1)
-                
-        except Exception as e:
-            logger.debug(f"Client disconnected: {e}")
-        finally:
-            if client_socket in self.clients:
-                self.clients.remove(client_socket)
-            try:
-                client_socket.close()
-            except Exception:
-                pass
+        with self._clients_lock:
+            # Clients are only written to, so a vanished one shows up here as a send error
+            for client in tuple(self.clients):
+                try:
+                    client.sendall(message)
+                except OSError:
+                    self.clients.discard(client)
+                    try:
+                        client.close()
+                    except Exception:
+                        pass
     
     def accept_clients(self):
-        """Accept client connections in a separate thread"""
+        """Accept client connections; each gets the current state and then joins the broadcast set."""
         while self.running:
             try:
                 client_socket, _ = self.server_socket.accept()
-                self.clients.append(client_socket)
-                
-                client_thread = threading.Thread(
-                    target=self.handle_client,
-                    args=(client_socket,),
-                    daemon=True
-                )
-                client_thread.start()
+                with self._clients_lock:
+                    try:
+                        client_socket.sendall(self._encoded_state)
+                    except OSError as e:
+                        logger.debug(f"Client disconnected: {e}")
+                        client_socket.close()
+                        continue
+                    self.clients.add(client_socket)
                 
             except Exception as e:
                 if self.running:
@@ -3,13 +3,54 @@ import gi
 gi.require_version('Gtk', '4.0')
 from gi.repository import Gtk, GLib
 import logging
-import subprocess
+import os
+import socket
+from hyprland_ipc import resolve_hyprland_socket_dir
 
 # Set up logging
 logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger(__name__)
 
+# Hyprland's request socket, resolved once per process; None outside Hyprland
+_hypr_socket_dir = resolve_hyprland_socket_dir()
+HYPR_SOCKET_PATH = os.path.join(_hypr_socket_dir, ".socket.sock") if _hypr_socket_dir else None
+
+def hypr_dispatch(args):
+    """
+    Run a Hyprland dispatcher (what `hyprctl dispatch <args>` does) straight over IPC,
+    without forking. The reply is read from the main loop, so the UI never waits on it.
+    """
+    if HYPR_SOCKET_PATH is None:
+        return False
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM | socket.SOCK_CLOEXEC | socket.SOCK_NONBLOCK)
+    try:
+        sock.connect(HYPR_SOCKET_PATH)
+        sock.send(f"dispatch {args}".encode('utf-8'))
+    except OSError as e:
+        logger.error(f"Error sending 'dispatch {args}' to Hyprland: {e}")
+        sock.close()
+        return False
+    GLib.unix_fd_add_full(
+        GLib.PRIORITY_DEFAULT, sock.fileno(),
+        GLib.IOCondition.IN | GLib.IOCondition.HUP | GLib.IOCondition.ERR,
+        _on_dispatch_reply, sock, args)
+    return True
+
+def _on_dispatch_reply(fd, condition, sock, args):
+    # Hyprland answers "ok" or an error message, then closes the connection
+    try:
+        reply = sock.recv(256)
+    except OSError:
+        reply = b""
+    if reply != b"ok":
+        logger.error(f"Hyprland rejected 'dispatch {args}': {reply.decode('utf-8', 'replace')}")
+    sock.close()
+    return GLib.SOURCE_REMOVE
+
 class WorkspaceIsland(Gtk.Box):
+    SCROLL_THRESHOLD = 1.0 # One wheel notch; smooth (touchpad) deltas add up to it
+    SCROLL_MIN_INTERVAL_US = 80_000 # At most one switch per 80 ms, however fast the flick
+
     def __init__(self):
         super().__init__(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
         self.add_css_class("island")
@@ -20,7 +61,11 @@ class WorkspaceIsland(Gtk.Box):
         # Store workspace buttons to update them
         self.workspace_buttons = {}
         self.active_workspace_id = None
+        self._active_button = None # The one button carrying "active-workspace"
+        self._last_sig = None # What the buttons currently show, see update_workspaces
         self.ordered_workspace_ids = [] # To keep track of order for scrolling
+        self._scroll_accum = 0.0
+        self._last_scroll_ts = 0 # GLib monotonic time (us) of the last dispatched switch
 
         # Event controller for scroll events
         scroll_controller = Gtk.EventControllerScroll.new(Gtk.EventControllerScrollFlags.VERTICAL) # Pass flags to constructor
@@ -31,6 +76,12 @@ class WorkspaceIsland(Gtk.Box):
         self.update_workspaces([], None)
 
     def update_workspaces(self, workspaces_data, active_id):
+        # Only id, name and the active id are drawn; a repeat (e.g. the greeting after
+        # a reconnect, or a window count change) leaves the buttons as they are
+        sig = (active_id, tuple((ws.get('id'), ws.get('name')) for ws in workspaces_data))
+        if sig == self._last_sig:
+            return
+        self._last_sig = sig
         self.active_workspace_id = active_id
         # Filter out special workspaces (IDs < 0) if not already done by service
         # and sort by ID to ensure consistent ascending order
@@ -47,12 +98,9 @@ class WorkspaceIsland(Gtk.Box):
                 button_to_remove = self.workspace_buttons.pop(ws_id)
                 self.remove(button_to_remove)
         
-        # Clear the box and re-add buttons in correct order
-        # This ensures the visual order matches the logical order
-        for child in list(self):
-            self.remove(child)
-        
-        # Add/Update buttons in ascending order
+        # Add/Update buttons in ascending order. Each button is placed right after the
+        # previous one, so only new or out-of-order buttons touch the box at all.
+        prev_button = None
         for ws_data in valid_workspaces_data:
             ws_id = ws_data['id']
             ws_name = str(ws_data.get('name', ws_id)) # Use name, fallback to ID
@@ -60,39 +108,49 @@ class WorkspaceIsland(Gtk.Box):
             if ws_id not in self.workspace_buttons:
                 button = Gtk.Button(label=ws_name)
                 button.add_css_class("workspace-button")
+                button.add_css_class("inactive-workspace")
                 button.ws_id = ws_id 
                 button.connect("clicked", self.on_workspace_button_clicked)
                 self.workspace_buttons[ws_id] = button
+                self.insert_child_after(button, prev_button) # None means first
             else:
                 button = self.workspace_buttons[ws_id]
                 if button.get_label() != ws_name:
                     button.set_label(ws_name)
+                if button.get_prev_sibling() is not prev_button:
+                    self.reorder_child_after(button, prev_button)
+            prev_button = button
 
-            # Add button to the box in order
-            self.append(button)
-
-            # Update style for active/inactive
-            if ws_id == self.active_workspace_id:
-                button.add_css_class("active-workspace")
-                button.remove_css_class("inactive-workspace")
-            else:
-                button.add_css_class("inactive-workspace")
-                button.remove_css_class("active-workspace")
+        # Update style for active/inactive: only the buttons whose state flipped
+        new_active_button = self.workspace_buttons.get(active_id)
+        if new_active_button is not self._active_button:
+            if self._active_button is not None:
+                self._active_button.remove_css_class("active-workspace")
+                self._active_button.add_css_class("inactive-workspace")
+            if new_active_button is not None:
+                new_active_button.remove_css_class("inactive-workspace")
+                new_active_button.add_css_class("active-workspace")
+            self._active_button = new_active_button
 
     def on_workspace_button_clicked(self, button):
         ws_id_to_switch = button.ws_id
         logger.info(f"Workspace button {ws_id_to_switch} clicked.")
-        try:
-            subprocess.run(["hyprctl", "dispatch", "workspace", str(ws_id_to_switch)], check=True)
-        except FileNotFoundError:
-            logger.error("hyprctl command not found. Please ensure it is in your PATH.")
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Error switching workspace using hyprctl: {e}")
+        hypr_dispatch(f"workspace {ws_id_to_switch}")
 
     def on_scroll(self, controller, dx, dy):
         if not self.ordered_workspace_ids or self.active_workspace_id is None:
             return True # Event handled, do nothing
 
+        self._scroll_accum += dy
+        if abs(self._scroll_accum) < self.SCROLL_THRESHOLD:
+            return True # Not a full notch yet
+        now = GLib.get_monotonic_time()
+        if now - self._last_scroll_ts < self.SCROLL_MIN_INTERVAL_US:
+            self._scroll_accum = 0.0 # Too soon after the last switch: drop it
+            return True
+        self._last_scroll_ts = now
+        dy, self._scroll_accum = self._scroll_accum, 0.0
+
         try:
             current_active_index = self.ordered_workspace_ids.index(self.active_workspace_id)
         except ValueError:
@@ -110,23 +168,13 @@ class WorkspaceIsland(Gtk.Box):
         elif dy > 0:  # Scroll down
             if current_active_index == len(self.ordered_workspace_ids) - 1:
                 logger.info("On the last workspace, creating new one by dispatching 'workspace +1'")
-                try:
-                    subprocess.run(["hyprctl", "dispatch", "workspace", "+1"], check=True)
-                except FileNotFoundError:
-                    logger.error("hyprctl command not found. Please ensure it is in your PATH.")
-                except subprocess.CalledProcessError as e:
-                    logger.error(f"Error creating new workspace via scroll: {e}")
+                hypr_dispatch("workspace +1")
                 return True # Action dispatched, service will update UI
             else:
                 target_ws_id = self.ordered_workspace_ids[current_active_index + 1]
         
         if target_ws_id is not None:
             logger.info(f"Scrolling to workspace {target_ws_id}")
-            try:
-                subprocess.run(["hyprctl", "dispatch", "workspace", str(target_ws_id)], check=True)
-            except FileNotFoundError:
-                logger.error("hyprctl command not found. Please ensure it is in your PATH.")
-            except subprocess.CalledProcessError as e:
-                logger.error(f"Error switching workspace via scroll: {e}")
+            hypr_dispatch(f"workspace {target_ws_id}")
         
         return True # Event handled
\ No newline at end of file